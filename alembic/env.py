@@ -6,6 +6,7 @@ from alembic import context
 from app.core.config import settings
 from app.core.database import Base
 from app.models.db.user import User
+from app.models.db.rate_snapshot import RateSnapshot
 
 config = context.config
 
@@ -37,7 +38,7 @@ def do_run_migrations(connection):
 
 async def run_async_migrations():
     configuration = config.get_section(config.config_ini_section)
-    configuration["sqlalchemy.url"] = get_url()
+    configuration["sqlalchemy.url"] = settings.database_url
 
     connectable = async_engine_from_config(
         configuration,
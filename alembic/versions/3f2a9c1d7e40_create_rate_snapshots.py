@@ -0,0 +1,41 @@
+"""create rate_snapshots
+
+Revision ID: 3f2a9c1d7e40
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7e40'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('base', sa.String(length=10), nullable=False),
+        sa.Column('quote', sa.String(length=10), nullable=False),
+        sa.Column('rate', sa.Numeric(precision=28, scale=12), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_rate_snapshots_base_quote_fetched_at',
+        'rate_snapshots',
+        ['base', 'quote', 'fetched_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_snapshots_base_quote_fetched_at', table_name='rate_snapshots')
+    op.drop_table('rate_snapshots')
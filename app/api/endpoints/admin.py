@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Response, status
+from app.core.security import require_admin
+from app.core.tracing import tracer
+from app.models.schemas.admin import TracingConfigRequest, TracingStatusResponse
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/tracing", response_model=TracingStatusResponse)
+async def get_tracing():
+    return TracingStatusResponse(**tracer.status())
+
+
+@router.put("/tracing", response_model=TracingStatusResponse)
+async def configure_tracing(config: TracingConfigRequest):
+    """
+    Switch sampled tracing on or off. While on, a `sample_rate` fraction
+    of requests record spans, `profile_rate` of those are also profiled,
+    and traced requests slower than `slow_threshold` seconds go to the
+    slow request log. Tracing switches itself off after `duration` seconds
+    (null keeps it on until switched off).
+    """
+    tracer.configure(
+        enabled=config.enabled,
+        sample_rate=config.sample_rate,
+        profile_rate=config.profile_rate,
+        slow_threshold=config.slow_threshold,
+        duration=config.duration,
+    )
+    return TracingStatusResponse(**tracer.status())
+
+
+@router.get("/tracing/profile")
+async def get_profile():
+    """Aggregate profile of sampled requests, in collapsed-stack format for flame graphs."""
+    return Response(content=tracer.profiler.collapsed(), media_type="text/plain; charset=utf-8")
+
+
+@router.delete("/tracing/profile", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_profile():
+    tracer.profiler.reset()
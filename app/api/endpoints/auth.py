@@ -1,37 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, HTTPException, status
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from app.core.database import db
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.core.hashing import HasherSaturatedError, password_hasher
+from app.core.security import create_access_token
 from app.models.db.user import User
 from app.models.schemas.auth import UserCreate, Token
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
-@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(
-        user_data: UserCreate,
-        session: AsyncSession = Depends(db.get_db),
-):
-    result = await session.execute(
-        select(User).where(User.username == user_data.username)
+
+
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry",
+        headers={"Retry-After": "1"},
     )
-    if result.scalar_one_or_none():
+
+
+@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
+async def register(user_data: UserCreate):
+    # Connections are held only around the queries, never while hashing.
+    async with db.read_session() as session:
+        result = await session.execute(
+            select(User).where(User.username == user_data.username)
+        )
+        existing = result.scalar_one_or_none()
+
+    if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
 
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except HasherSaturatedError:
+        raise _hasher_busy()
     new_user = User(
         username=user_data.username,
         hashed_password=hashed_password
     )
 
-    session.add(new_user)
-    await session.commit()
-    await session.refresh(new_user)
+    async with db.session() as write_session:
+        write_session.add(new_user)
+        try:
+            await write_session.commit()
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already registered"
+            )
 
-    access_token = create_access_token(user_id=new_user.id)
+    access_token = create_access_token(
+        user_id=new_user.id,
+        username=new_user.username
+    )
     return Token(access_token=access_token, token_type="bearer")
 
 
@@ -39,18 +63,39 @@ async def register(
 async def login(
         username: str,
         password: str,
-        session: AsyncSession = Depends(db.get_db),
 ):
+    async with db.read_session() as session:
+        result = await session.execute(
+            select(User).where(User.username == username)
+        )
+        user = result.scalar_one_or_none()
 
-    result = await session.execute(
-        select(User).where(User.username == username)
-    )
-    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password"
+        )
+
+    try:
+        verified, new_hash = await password_hasher.verify_and_update(
+            password,
+            user.hashed_password
+        )
+    except HasherSaturatedError:
+        raise _hasher_busy()
 
-    if not user or not verify_password(password, user.hashed_password):
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
-    access_token = create_access_token(user_id=user.id)
+
+    if new_hash is not None:
+        async with db.session() as write_session:
+            stored = await write_session.get(User, user.id)
+            if stored is not None:
+                stored.hashed_password = new_hash
+                await write_session.commit()
+
+    access_token = create_access_token(user_id=user.id, username=user.username)
     return Token(access_token=access_token, token_type="bearer")
@@ -1,43 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Type, Union
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.admission import admit, rate_limit_user
+from app.core.config import settings
+from app.core.database import db
+from app.core.http_cache import (
+    cache_headers,
+    etag_matches,
+    make_etag,
+    not_modified,
+    rate_cache_headers,
+)
+from app.core.rate_store import rate_store, to_utc
+from app.core.responses import FastJSONResponse
 from app.core.security import get_current_user
+from app.core.streaming import (
+    CSVCodec,
+    NDJSONCodec,
+    RequestStreamingResponse,
+    iter_line_batches,
+)
 from app.models.db.user import User
 from app.models.schemas.currency import (
     CurrencyConvertRequest,
     ConversionResponse,
+    BatchConversionItem,
     ExchangeRateResponse,
     CurrencyListResponse,
+    RateMatrixResponse,
+    RateRefresherStatusResponse,
+    RateHistoryResponse,
 )
 from app.clients.currency_client import currency_client
+from app.clients.rate_feed import Pair, rate_broadcaster
+from app.clients.rate_refresher import rate_refresher
+
+router = APIRouter(
+    prefix="/currency",
+    tags=["Currency"],
+    # Rate limiting runs first, so a user's requests over the limit get
+    # their 429 without taking global admission slots from other users.
+    dependencies=[Depends(rate_limit_user), Depends(admit)],
+)
+
+_currency_list: Dict[str, Any] = {}
+
+
+def _render(
+    response: Response,
+    model: Type[BaseModel],
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+):
+    """Build the endpoint's result, via FastJSONResponse when enabled."""
+    if settings.fast_json_responses:
+        return FastJSONResponse(payload, headers=headers)
+    if headers:
+        response.headers.update(headers)
+    return model(**payload)
+
 
-router = APIRouter(prefix="/currency", tags=["Currency"])
+def _validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors()
+    )
+
+
+async def prerender_currency_list() -> None:
+    """Serialize the static currency list and its validators once."""
+    currencies = await currency_client.get_currency_list()
+    _currency_list["body"] = CurrencyListResponse(currencies=currencies).model_dump_json()
+    _currency_list["headers"] = cache_headers(
+        make_etag("list", *sorted(currencies.items())),
+        max_age=settings.currency_list_max_age,
+    )
 
 
 @router.get("/exchange", response_model=ExchangeRateResponse)
 async def get_exchange_rate(
+    request: Request,
+    response: Response,
     from_currency: str,
     to_currency: str,
     current_user: User = Depends(get_current_user),
 ):
+    from_currency = from_currency.upper()
+    to_currency = to_currency.upper()
+    base = currency_client.rate_base(from_currency)
+
+    headers = rate_cache_headers(
+        currency_client.rate_cache, base, "exchange", from_currency, to_currency,
+        fresh_only=True
+    )
+    if headers and etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+
     try:
         rate = await currency_client.get_exchange_rate(
-            from_currency.upper(),
-            to_currency.upper()
-        )
-        return ExchangeRateResponse(
-            from_currency=from_currency.upper(),
-            to_currency=to_currency.upper(),
-            exchange_rate=rate
+            from_currency,
+            to_currency
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=502, detail="Currency API error")
 
+    return _render(
+        response,
+        ExchangeRateResponse,
+        {
+            "from_currency": from_currency,
+            "to_currency": to_currency,
+            "exchange_rate": rate,
+        },
+        rate_cache_headers(
+            currency_client.rate_cache, base, "exchange", from_currency, to_currency
+        ),
+    )
+
 
 @router.post("/convert", response_model=ConversionResponse)
 async def convert_currency(
     conversion: CurrencyConvertRequest,
+    response: Response,
     current_user: User = Depends(get_current_user),
 ):
     try:
@@ -46,16 +136,282 @@ async def convert_currency(
             conversion.to_currency.upper(),
             conversion.amount
         )
-        return ConversionResponse(**result)
+        return _render(response, ConversionResponse, result)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=502, detail="Currency API error")
 
 
+@router.post("/convert/batch", response_model=List[BatchConversionItem])
+async def convert_currency_batch(
+    conversions: List[Any] = Body(..., max_length=settings.batch_max_items),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Convert many items in one request. Each item is validated on its own,
+    so an invalid item gets an error in its slot instead of failing the batch.
+    """
+    items: List[Dict[str, Any]] = [{"result": None, "error": None} for _ in conversions]
+    valid = []
+    for index, raw in enumerate(conversions):
+        try:
+            item = CurrencyConvertRequest.model_validate(raw)
+        except ValidationError as e:
+            items[index]["error"] = _validation_error(e)
+            continue
+        valid.append((index, (item.from_currency.upper(), item.to_currency.upper(), item.amount)))
+
+    results = await currency_client.convert_many([conversion for _, conversion in valid])
+
+    for (index, _), result in zip(valid, results):
+        if isinstance(result, ValueError):
+            items[index]["error"] = str(result)
+        elif isinstance(result, Exception):
+            items[index]["error"] = "Currency API error"
+        else:
+            items[index]["result"] = result
+
+    if settings.fast_json_responses:
+        return FastJSONResponse(items)
+    return [BatchConversionItem.model_validate(item) for item in items]
+
+
+async def _convert_rows(
+    request: Request,
+    codec: Union[CSVCodec, NDJSONCodec],
+) -> AsyncIterator[bytes]:
+    header = codec.header()
+    if header:
+        yield header
+    line_number = 0
+
+    async for lines in iter_line_batches(
+        request.stream(),
+        max_line_bytes=settings.stream_max_line_bytes
+    ):
+        out = []
+        for line in lines:
+            line_number += 1
+            row = None
+            try:
+                if line is None:
+                    raise ValueError(f"Line exceeds {settings.stream_max_line_bytes} bytes")
+                row = codec.parse(line)
+                if row is None:
+                    continue
+                conversion = CurrencyConvertRequest.model_validate(row)
+                from_currency = conversion.from_currency.upper()
+                to_currency = conversion.to_currency.upper()
+                rates = await currency_client.get_rates(
+                    currency_client.rate_base(from_currency)
+                )
+                exchange_rate = currency_client.lookup_rate(rates, from_currency, to_currency)
+                out.append(codec.format(currency_client.build_conversion(
+                    from_currency, to_currency, conversion.amount, exchange_rate
+                )))
+            except ValidationError as e:
+                out.append(codec.format(
+                    {**(row or {}), "line": line_number, "error": _validation_error(e)}
+                ))
+            except ValueError as e:
+                out.append(codec.format({**(row or {}), "line": line_number, "error": str(e)}))
+            except Exception:
+                out.append(codec.format(
+                    {**(row or {}), "line": line_number, "error": "Currency API error"}
+                ))
+        if out:
+            yield b"".join(out)
+
+
+@router.post("/convert/stream")
+async def convert_currency_stream(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Convert NDJSON (application/x-ndjson) or CSV (text/csv) rows as they arrive.
+
+    Results are streamed back in the same format, one line per input row.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        codec = NDJSONCodec()
+    elif content_type == "text/csv":
+        codec = CSVCodec()
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Expected application/x-ndjson or text/csv"
+        )
+
+    return RequestStreamingResponse(
+        _convert_rows(request, codec),
+        media_type=codec.media_type
+    )
+
+
+async def _rate_events(pairs: List[Pair]) -> AsyncIterator[bytes]:
+    # Subscribed only once the response starts iterating, so a generator
+    # that never runs leaves nothing registered.
+    subscription = rate_broadcaster.subscribe(pairs)
+    try:
+        yield b"retry: 3000\n\n"
+        await rate_broadcaster.prime(subscription)
+
+        # StreamingResponse cancels this generator when the client disconnects.
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    settings.rate_stream_keepalive
+                )
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        rate_broadcaster.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_rates(
+    pairs: str,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Live rates as Server-Sent Events for `pairs`, e.g. ``USD/EUR,EUR/GBP``.
+
+    Sends a `rate` (or `error`) event per pair first, then a `rate` event
+    whenever a pair's rate changes.
+    """
+    known = await currency_client.get_currency_list()
+    parsed = []
+    for item in pairs.split(","):
+        codes = [code.strip().upper() for code in item.split("/")]
+        if len(codes) != 2 or any(len(code) != 3 for code in codes):
+            raise HTTPException(status_code=400, detail=f"Invalid pair: {item.strip()}")
+        unknown = [code for code in codes if code not in known]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown currency: {unknown[0]}")
+        parsed.append((codes[0], codes[1]))
+    parsed = list(dict.fromkeys(parsed))
+    if len(parsed) > settings.rate_stream_max_pairs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.rate_stream_max_pairs} pairs per stream"
+        )
+
+    return StreamingResponse(
+        _rate_events(parsed),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/list", response_model=CurrencyListResponse)
 async def get_currency_list(
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
-    currencies = await currency_client.get_currency_list()
-    return CurrencyListResponse(currencies=currencies)
+    if not _currency_list:
+        await prerender_currency_list()
+
+    headers = _currency_list["headers"]
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+    return Response(
+        content=_currency_list["body"],
+        media_type="application/json",
+        headers=headers
+    )
+
+
+@router.get("/matrix", response_model=RateMatrixResponse)
+async def get_rate_matrix(
+    request: Request,
+    response: Response,
+    currencies: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    if currencies:
+        codes = list(dict.fromkeys(
+            code.strip().upper() for code in currencies.split(",") if code.strip()
+        ))
+        if len(codes) > settings.matrix_max_currencies:
+            raise HTTPException(
+                status_code=422,
+                detail=f"At most {settings.matrix_max_currencies} currencies per matrix"
+            )
+    else:
+        codes = list(await currency_client.get_currency_list())
+
+    base = currency_client.pivot_currency
+    headers = rate_cache_headers(
+        currency_client.rate_cache, base, "matrix", *codes, fresh_only=True
+    )
+    if headers and etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+
+    try:
+        matrix = await currency_client.get_rate_matrix(codes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail="Currency API error")
+
+    return _render(
+        response,
+        RateMatrixResponse,
+        {"base": base, "rates": matrix},
+        rate_cache_headers(currency_client.rate_cache, base, "matrix", *codes),
+    )
+
+
+@router.get("/refresh-status", response_model=RateRefresherStatusResponse)
+async def get_refresh_status(
+    current_user: User = Depends(get_current_user),
+):
+    return rate_refresher.status()
+
+
+@router.get("/history", response_model=RateHistoryResponse)
+async def get_rate_history(
+    from_currency: str,
+    to_currency: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: int = Query(default=3600, gt=0),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(db.get_read_db),
+):
+    from_currency = from_currency.upper()
+    to_currency = to_currency.upper()
+    end = to_utc(end) if end else datetime.now(timezone.utc)
+    start = to_utc(start) if start else end - timedelta(days=1)
+
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start).total_seconds() / interval > settings.history_max_points:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range holds more than {settings.history_max_points} intervals"
+        )
+
+    points = await rate_store.history(
+        session,
+        base=currency_client.rate_base(from_currency),
+        quotes=currency_client.rate_quotes(from_currency, to_currency),
+        start=start,
+        end=end,
+        interval=interval,
+        resolve=lambda table: currency_client.lookup_rate(table, from_currency, to_currency),
+    )
+    return RateHistoryResponse(
+        from_currency=from_currency,
+        to_currency=to_currency,
+        interval=interval,
+        points=points,
+    )
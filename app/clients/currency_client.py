@@ -1,33 +1,143 @@
-from decimal import Decimal
-from typing import Dict
-from app.core.base_client import BaseClient
+import asyncio
+import logging
+import time
+from decimal import Context, Decimal, DivisionByZero, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from app.clients.providers import ProviderRouter, build_router
+from app.core.cache import CacheEntry, RateCache
 from app.core.config import settings
+from app.core.rate_store import rate_store
+from app.core.shared_rates import SharedRateStore, shared_rates
 
+logger = logging.getLogger(__name__)
 
-class CurrencyClient(BaseClient):
 
-    def __init__(self):
-        super().__init__(
-            base_url=settings.currency_api_url,
-            timeout=10.0
+class CurrencyClient:
+
+    def __init__(self, router: ProviderRouter, shared: Optional[SharedRateStore] = None):
+        self.router = router
+        self.shared_rates = shared
+        self.rate_cache = RateCache(
+            ttl=settings.rate_cache_ttl,
+            stale_ttl=settings.rate_cache_stale_ttl,
+            max_size=settings.rate_cache_max_size,
         )
+        self.triangulation = settings.rate_triangulation
+        self.pivot_currency = settings.rate_pivot_currency.upper()
+        self.rate_context = Context(prec=settings.rate_precision)
 
-    async def get_exchange_rate(
+    async def start(self) -> None:
+        await self.router.start()
+
+    async def close(self) -> None:
+        await self.router.close()
+        if self.shared_rates is not None:
+            self.shared_rates.close()
+
+    async def fetch_rates(self, base: str) -> Dict[str, Decimal]:
+        return await self.router.fetch_rates(base)
+
+    async def load_rates(
+            self,
+            base: str,
+            refresh: bool = False
+    ) -> Union[Dict[str, Decimal], CacheEntry]:
+        """
+        Cache loader: serve a fresh table from the shared store (unless
+        refreshing), or on a cold cache a recent persisted snapshot;
+        otherwise fetch upstream, publish the table if this worker leads
+        the shared store, and persist it.
+        """
+        if self.shared_rates is not None and not refresh:
+            shared = self.shared_rates.read(base)
+            if shared is not None and shared[1] < self.rate_cache.ttl:
+                rates, age = shared
+                return CacheEntry(value=rates, stored_at=time.monotonic() - age)
+
+        if settings.rate_snapshots_enabled and self.rate_cache.peek(base) is None:
+            try:
+                snapshot = await rate_store.load_latest(base, max_age=self.rate_cache.ttl)
+            except Exception as e:
+                logger.warning("Reading rate snapshot for %s failed: %s", base, e)
+                snapshot = None
+            if snapshot is not None:
+                rates, age = snapshot
+                return CacheEntry(value=rates, stored_at=time.monotonic() - age)
+
+        rates = await self.fetch_rates(base)
+        if self.shared_rates is not None and self.shared_rates.try_lead():
+            self.shared_rates.write(base, rates)
+        if settings.rate_snapshots_enabled:
+            rate_store.save_in_background(base, rates)
+        return rates
+
+    async def get_rates(self, base: str) -> Dict[str, Decimal]:
+        return await self.rate_cache.get(base, lambda: self.load_rates(base))
+
+    async def refresh_rates(self, base: str) -> Dict[str, Decimal]:
+        return await self.rate_cache.refresh(base, lambda: self.load_rates(base, refresh=True))
+
+    def cross_rate(
             self,
+            pivot_rates: Dict[str, Decimal],
             from_currency: str,
             to_currency: str
     ) -> Decimal:
-        response = await self.make_request(
-            method="GET",
-            endpoint=from_currency
-        )
-        data = response.json()
-        rates = data.get("rates", {})
+        """Derive from->to as rate(pivot->to) / rate(pivot->from)."""
+        rates = {self.pivot_currency: Decimal(1), **pivot_rates}
+
+        for currency in (from_currency, to_currency):
+            if currency not in rates:
+                raise ValueError(f"Currency {currency} not found")
+
+        try:
+            return self.rate_context.divide(rates[to_currency], rates[from_currency])
+        except (DivisionByZero, InvalidOperation):
+            raise ValueError(f"Currency {from_currency} has no usable rate")
+
+    def rate_base(self, from_currency: str) -> str:
+        """Base currency whose table resolves rates from `from_currency`."""
+        return self.pivot_currency if self.triangulation else from_currency
+
+    def lookup_rate(
+            self,
+            rates: Dict[str, Decimal],
+            from_currency: str,
+            to_currency: str
+    ) -> Decimal:
+        """Resolve from->to in the table fetched for `rate_base(from_currency)`."""
+        if self.triangulation:
+            return self.cross_rate(rates, from_currency, to_currency)
 
         if to_currency not in rates:
             raise ValueError(f"Currency {to_currency} not found")
 
-        return Decimal(str(rates[to_currency]))
+        return rates[to_currency]
+
+    async def get_exchange_rate(
+            self,
+            from_currency: str,
+            to_currency: str
+    ) -> Decimal:
+        rates = await self.get_rates(self.rate_base(from_currency))
+        return self.lookup_rate(rates, from_currency, to_currency)
+
+    @staticmethod
+    def build_conversion(
+            from_currency: str,
+            to_currency: str,
+            amount: Decimal,
+            exchange_rate: Decimal
+    ) -> Dict[str, Decimal]:
+        converted_amount = amount * exchange_rate
+
+        return {
+            "from_currency": from_currency,
+            "to_currency": to_currency,
+            "amount": amount,
+            "converted_amount": converted_amount.quantize(Decimal("0.01")),
+            "exchange_rate": exchange_rate
+        }
 
     async def convert_currency(
             self,
@@ -41,14 +151,67 @@ class CurrencyClient(BaseClient):
             to_currency
         )
 
-        converted_amount = amount * exchange_rate
+        return self.build_conversion(
+            from_currency,
+            to_currency,
+            amount,
+            exchange_rate
+        )
+
+    async def convert_many(
+            self,
+            conversions: Sequence[Tuple[str, str, Decimal]]
+    ) -> List[Union[Dict[str, Decimal], Exception]]:
+        """
+        Convert many (from, to, amount) items with one rate lookup per base.
+
+        Results keep input order; an item that fails yields its exception
+        instead of a conversion.
+        """
+        bases = list({self.rate_base(from_currency) for from_currency, _, _ in conversions})
+        tables = await asyncio.gather(
+            *(self.get_rates(base) for base in bases),
+            return_exceptions=True
+        )
+        rates_by_base = dict(zip(bases, tables))
+
+        results: List[Union[Dict[str, Decimal], Exception]] = []
+        for from_currency, to_currency, amount in conversions:
+            rates = rates_by_base[self.rate_base(from_currency)]
+            try:
+                if isinstance(rates, Exception):
+                    raise rates
+                exchange_rate = self.lookup_rate(rates, from_currency, to_currency)
+                results.append(
+                    self.build_conversion(from_currency, to_currency, amount, exchange_rate)
+                )
+            except Exception as e:
+                results.append(e)
+
+        return results
+
+    def rate_quotes(self, from_currency: str, to_currency: str) -> List[str]:
+        """Quotes of the `rate_base(from_currency)` table needed for from->to."""
+        if self.triangulation:
+            return [
+                currency for currency in {from_currency, to_currency}
+                if currency != self.pivot_currency
+            ]
+        return [to_currency]
+
+    async def get_rate_matrix(
+            self,
+            currencies: Iterable[str]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        currencies = list(currencies)
+        pivot_rates = await self.get_rates(self.pivot_currency)
 
         return {
-            "from_currency": from_currency,
-            "to_currency": to_currency,
-            "amount": amount,
-            "converted_amount": converted_amount.quantize(Decimal("0.01")),
-            "exchange_rate": exchange_rate
+            from_currency: {
+                to_currency: self.cross_rate(pivot_rates, from_currency, to_currency)
+                for to_currency in currencies
+            }
+            for from_currency in currencies
         }
 
     async def get_currency_list(self) -> Dict[str, str]:
@@ -63,5 +226,5 @@ class CurrencyClient(BaseClient):
             "AUD": "Australian Dollar",
         }
 
-currency_client = CurrencyClient()
+currency_client = CurrencyClient(build_router(), shared=shared_rates)
 
@@ -0,0 +1,251 @@
+"""
+Pluggable rate providers and a latency-aware router across them.
+"""
+
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Type
+import httpx
+from app.core.base_client import BaseClient
+from app.core.config import ProviderConfig, settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """Raised when a provider answers with something that is not a rate table."""
+
+
+class RateProvider(BaseClient):
+    """Upstream source of rate tables. Subclasses adapt one response format."""
+
+    def __init__(
+            self,
+            name: str,
+            base_url: str,
+            api_key: Optional[str] = None,
+            timeout: Optional[float] = None,
+    ):
+        super().__init__(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout if timeout is not None else settings.upstream_timeout
+        )
+        self.name = name
+        self.api_key = api_key
+
+    async def fetch_rates(self, base: str) -> Dict[str, Decimal]:
+        """Return {quote: units of quote per 1 base} for `base`."""
+        raise NotImplementedError
+
+
+class RatesPathProvider(RateProvider):
+    """GET {url}/{base} -> {"rates": {"EUR": 0.92, ...}}"""
+
+    async def fetch_rates(self, base: str) -> Dict[str, Decimal]:
+        response = await self.make_request(
+            method="GET",
+            endpoint=base,
+            route="{base}",
+        )
+        data = response.json()
+        return {
+            code: Decimal(str(value))
+            for code, value in data.get("rates", {}).items()
+        }
+
+
+class ApiLayerProvider(RateProvider):
+    """GET {url}/live?source={base} -> {"quotes": {"USDEUR": 0.92, ...}}"""
+
+    async def fetch_rates(self, base: str) -> Dict[str, Decimal]:
+        response = await self.make_request(
+            method="GET",
+            endpoint="live",
+            params={"source": base},
+            headers={"apikey": self.api_key} if self.api_key else None,
+        )
+        data = response.json()
+        if not data.get("success", True):
+            raise ProviderError(f"{self.name}: {data.get('error')}")
+
+        rates = {base: Decimal(1)}
+        for pair, value in data.get("quotes", {}).items():
+            if pair.startswith(base):
+                rates[pair[len(base):]] = Decimal(str(value))
+        return rates
+
+
+class StaticProvider(RateProvider):
+    """In-process provider serving a fixed table; for local runs and tests."""
+
+    def __init__(self, name: str, rates: Dict[str, float], pivot: str = "USD"):
+        super().__init__(name=name, base_url=f"static://{name}")
+        self.pivot = pivot
+        self.rates = {code: Decimal(str(value)) for code, value in rates.items()}
+        self.rates.setdefault(pivot, Decimal(1))
+
+    async def fetch_rates(self, base: str) -> Dict[str, Decimal]:
+        if base not in self.rates:
+            raise ProviderError(f"{self.name}: unknown base {base}")
+        base_rate = self.rates[base]
+        return {code: rate / base_rate for code, rate in self.rates.items()}
+
+
+PROVIDER_FORMATS: Dict[str, Type[RateProvider]] = {
+    "rates": RatesPathProvider,
+    "apilayer": ApiLayerProvider,
+}
+
+
+def build_provider(config: ProviderConfig) -> RateProvider:
+    if config.format == "static":
+        return StaticProvider(name=config.name, rates=config.rates or {})
+    if config.format not in PROVIDER_FORMATS:
+        raise ValueError(f"Unknown rate provider format: {config.format}")
+    return PROVIDER_FORMATS[config.format](
+        name=config.name,
+        base_url=config.url,
+        api_key=config.api_key,
+        timeout=config.timeout,
+    )
+
+
+# Statuses that depend on the request (e.g. an unknown base), so every
+# provider would answer the same. Auth failures (401/403) and throttling
+# are the provider's problem and fail over like any other error.
+REQUEST_ERROR_STATUSES = {400, 404, 422}
+
+
+def is_request_error(error: Exception) -> bool:
+    """True when the request itself was bad, not the provider."""
+    return (
+        isinstance(error, httpx.HTTPStatusError)
+        and error.response.status_code in REQUEST_ERROR_STATUSES
+    )
+
+
+class ProviderStats:
+    """EWMA of one provider's latency and error rate."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.last_attempt = 0.0
+
+    def record(self, latency: float, failed: bool) -> None:
+        self.error_rate += self.alpha * (float(failed) - self.error_rate)
+        if not failed:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.alpha * (latency - self.latency)
+
+
+class ProviderRouter:
+    """
+    Sends each fetch to the fastest healthy provider and fails over down
+    the list when it errors.
+
+    A provider is healthy while its error-rate EWMA stays under
+    `max_error_rate`; unhealthy providers are tried only after the healthy
+    ones. Any provider left untried for `probe_interval` seconds is moved
+    to the front for one request, so slower or failed providers keep fresh
+    latency figures and can prove they recovered.
+    """
+
+    def __init__(
+            self,
+            providers: List[RateProvider],
+            alpha: float = 0.2,
+            max_error_rate: float = 0.5,
+            probe_interval: float = 30.0,
+    ):
+        if not providers:
+            raise ValueError("At least one rate provider is required")
+        self.providers = providers
+        self.max_error_rate = max_error_rate
+        self.probe_interval = probe_interval
+        self.stats = {provider.name: ProviderStats(alpha) for provider in providers}
+
+    def healthy(self, provider: RateProvider) -> bool:
+        return self.stats[provider.name].error_rate < self.max_error_rate
+
+    def ranked(self) -> List[RateProvider]:
+        now = time.monotonic()
+
+        def key(provider: RateProvider) -> Any:
+            stats = self.stats[provider.name]
+            if stats.latency is None or now - stats.last_attempt >= self.probe_interval:
+                return False, 0.0, 0.0
+            return not self.healthy(provider), stats.latency, stats.error_rate
+
+        return sorted(self.providers, key=key)
+
+    async def fetch_rates(self, base: str) -> Dict[str, Decimal]:
+        error: Optional[Exception] = None
+
+        for provider in self.ranked():
+            start = time.monotonic()
+            self.stats[provider.name].last_attempt = start
+            try:
+                rates = await provider.fetch_rates(base)
+            except Exception as e:
+                # A bad request says nothing about the provider's health or
+                # speed, so it leaves the stats alone.
+                if is_request_error(e):
+                    raise
+                self.stats[provider.name].record(time.monotonic() - start, failed=True)
+                logger.warning("Rate provider %s failed for %s: %s", provider.name, base, e)
+                error = e
+                continue
+
+            self.stats[provider.name].record(time.monotonic() - start, failed=False)
+            return rates
+
+        raise error
+
+    async def start(self) -> None:
+        for provider in self.providers:
+            await provider.start()
+
+    async def close(self) -> None:
+        for provider in self.providers:
+            await provider.close()
+
+    def latency_stats(self) -> Dict[tuple, float]:
+        return {
+            (name,): stats.latency
+            for name, stats in self.stats.items()
+            if stats.latency is not None
+        }
+
+    def error_stats(self) -> Dict[tuple, float]:
+        return {(name,): stats.error_rate for name, stats in self.stats.items()}
+
+
+def build_router() -> ProviderRouter:
+    configs = settings.rate_providers or [
+        ProviderConfig(name="default", url=settings.currency_api_url, format="rates")
+    ]
+    router = ProviderRouter(
+        [build_provider(config) for config in configs],
+        alpha=settings.provider_ewma_alpha,
+        max_error_rate=settings.provider_max_error_rate,
+        probe_interval=settings.provider_probe_interval,
+    )
+    registry.gauge(
+        "rate_provider_latency_seconds",
+        "EWMA of successful fetch latency per rate provider",
+        ("provider",),
+        callback=router.latency_stats,
+    )
+    registry.gauge(
+        "rate_provider_error_rate",
+        "EWMA of the fetch error rate per rate provider",
+        ("provider",),
+        callback=router.error_stats,
+    )
+    return router
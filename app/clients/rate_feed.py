@@ -0,0 +1,204 @@
+"""
+Fan-out of rate changes to Server-Sent Events subscribers.
+"""
+
+import asyncio
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+from app.clients.currency_client import CurrencyClient, currency_client
+from app.core.cache import CacheEntry
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.responses import dumps
+
+Pair = Tuple[str, str]
+
+
+def encode_event(event: str, data: Dict[str, object]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class Subscription:
+    """One client's pairs and its bounded queue of encoded events."""
+
+    def __init__(self, pairs: List[Pair], queue_size: int):
+        self.pairs = pairs
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self.sent: Dict[Pair, Decimal] = {}
+
+    def send(self, pair: Pair, rate: Optional[Decimal], chunk: bytes) -> None:
+        """Queue `chunk` unless this subscriber already has `rate` for `pair`."""
+        if self.closed or (rate is not None and self.sent.get(pair) == rate):
+            return
+        if rate is not None:
+            self.sent[pair] = rate
+        try:
+            self.queue.put_nowait(chunk)
+        except asyncio.QueueFull:
+            # A consumer this far behind gets disconnected; SSE clients
+            # reconnect and receive a fresh snapshot.
+            self.close()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class RateBroadcaster:
+    """
+    Turns rate-table updates into per-pair delta events.
+
+    Listens to the client's RateCache: whenever a table is stored with new
+    content, every subscribed pair resolved from that table is recomputed
+    and, if its rate changed, encoded once and queued to each subscriber
+    of the pair. While anyone is subscribed, a pump re-reads the tables
+    every `poll_interval` so TTL expiry and background refreshes keep
+    producing updates. A base whose table fails to load is polled again
+    with exponential backoff, capped at `max_backoff`.
+    """
+
+    def __init__(
+            self,
+            client: CurrencyClient,
+            queue_size: int,
+            poll_interval: float,
+            max_backoff: float = 60.0,
+    ):
+        self.client = client
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self._subscribers: Dict[Pair, Set[Subscription]] = {}
+        self._pairs_by_base: Dict[str, Set[Pair]] = {}
+        self._last: Dict[Pair, Decimal] = {}
+        # base -> (consecutive failures, monotonic time of the next poll)
+        self._backoff: Dict[str, Tuple[int, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        client.rate_cache.add_listener(self._on_update)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def subscribe(self, pairs: List[Pair]) -> Subscription:
+        # Room for the initial snapshot on top of the regular backlog.
+        subscription = Subscription(pairs, self.queue_size + len(pairs))
+        for pair in pairs:
+            self._subscribers.setdefault(pair, set()).add(subscription)
+            self._pairs_by_base.setdefault(self.client.rate_base(pair[0]), set()).add(pair)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._pump())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for pair in subscription.pairs:
+            subscribers = self._subscribers.get(pair)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[pair]
+                self._last.pop(pair, None)
+                base = self.client.rate_base(pair[0])
+                self._pairs_by_base[base].discard(pair)
+                if not self._pairs_by_base[base]:
+                    del self._pairs_by_base[base]
+                    self._backoff.pop(base, None)
+
+    async def prime(self, subscription: Subscription) -> None:
+        """
+        Queue the current rate (or error) of each of the subscription's pairs.
+
+        Updates that arrive while the tables load go through the same
+        per-subscriber dedup, so no pair is sent twice at the same rate.
+        """
+        pairs = subscription.pairs
+        bases = list({self.client.rate_base(from_currency) for from_currency, _ in pairs})
+        tables = await asyncio.gather(
+            *(self.client.get_rates(base) for base in bases),
+            return_exceptions=True
+        )
+        tables_by_base = dict(zip(bases, tables))
+
+        for from_currency, to_currency in pairs:
+            pair = (from_currency, to_currency)
+            name = f"{from_currency}/{to_currency}"
+            rates = tables_by_base[self.client.rate_base(from_currency)]
+            try:
+                if isinstance(rates, Exception):
+                    raise rates
+                rate = self.client.lookup_rate(rates, from_currency, to_currency)
+            except ValueError as e:
+                subscription.send(pair, None, encode_event("error", {"pair": name, "error": str(e)}))
+            except Exception:
+                subscription.send(
+                    pair, None, encode_event("error", {"pair": name, "error": "Currency API error"})
+                )
+            else:
+                subscription.send(pair, rate, encode_event("rate", {"pair": name, "rate": rate}))
+
+    def _on_update(self, base: str, entry: CacheEntry) -> None:
+        for pair in self._pairs_by_base.get(base, ()):
+            try:
+                rate = self.client.lookup_rate(entry.value, *pair)
+            except ValueError:
+                continue
+            if self._last.get(pair) == rate:
+                continue
+            self._last[pair] = rate
+
+            chunk = encode_event("rate", {"pair": f"{pair[0]}/{pair[1]}", "rate": rate})
+            for subscription in list(self._subscribers.get(pair, ())):
+                subscription.send(pair, rate, chunk)
+
+    async def _pump(self) -> None:
+        while self._subscribers:
+            now = time.monotonic()
+            bases = [
+                base for base in list(self._pairs_by_base)
+                if base not in self._backoff or self._backoff[base][1] <= now
+            ]
+            results = await asyncio.gather(
+                *(self.client.get_rates(base) for base in bases),
+                return_exceptions=True
+            )
+            for base, result in zip(bases, results):
+                if isinstance(result, Exception):
+                    failures = self._backoff.get(base, (0, 0.0))[0] + 1
+                    delay = min(self.poll_interval * 2 ** failures, self.max_backoff)
+                    self._backoff[base] = (failures, time.monotonic() + delay)
+                else:
+                    self._backoff.pop(base, None)
+            await asyncio.sleep(self.poll_interval)
+
+    async def stop(self) -> None:
+        for subscription in {sub for subs in self._subscribers.values() for sub in subs}:
+            subscription.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+rate_broadcaster = RateBroadcaster(
+    currency_client,
+    queue_size=settings.rate_stream_queue_size,
+    poll_interval=settings.rate_stream_poll_interval,
+    max_backoff=settings.rate_stream_max_backoff,
+)
+
+registry.gauge(
+    "rate_stream_subscribers",
+    "Open live rate stream connections",
+    callback=lambda: {(): rate_broadcaster.subscriber_count},
+)
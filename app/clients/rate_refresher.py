@@ -0,0 +1,152 @@
+"""
+Background task that keeps rate tables warm in the CurrencyClient cache.
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from app.clients.currency_client import CurrencyClient, currency_client
+from app.core.config import settings
+from app.models.schemas.currency import RateRefresherStatusResponse, RateRefreshStatus
+
+logger = logging.getLogger(__name__)
+
+
+class RateRefresher:
+    """
+    Periodically refreshes the rate tables of a set of base currencies.
+
+    Each round waits `interval` seconds, jittered by +/- `jitter` of it so
+    workers do not refresh in lockstep. A base that fails is skipped with
+    exponential backoff (capped at `max_backoff`) instead of being retried
+    against a failing upstream every round. With a shared rate store only
+    its leader refreshes; the other workers read what it publishes.
+    """
+
+    def __init__(
+            self,
+            client: CurrencyClient,
+            interval: float,
+            jitter: float = 0.1,
+            max_backoff: float = 600.0,
+            bases: Optional[List[str]] = None,
+    ):
+        self.client = client
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.bases = [base.upper() for base in bases or []]
+        self.statuses: Dict[str, RateRefreshStatus] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._warmed = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def resolve_bases(self) -> List[str]:
+        if self.client.triangulation:
+            return [self.client.pivot_currency]
+        if self.bases:
+            return self.bases
+        return list(await self.client.get_currency_list())
+
+    async def _register_bases(self) -> None:
+        for base in await self.resolve_bases():
+            self.statuses.setdefault(base, RateRefreshStatus(base=base))
+
+    async def warm(self) -> List[str]:
+        """
+        Load every base into this worker's cache now and return the bases
+        that failed; `start` then waits an interval before the next round.
+
+        The shared store's leader runs a refresh round. Other workers
+        cannot refresh, so they prime their cache through `get_rates`,
+        which reads the leader's tables (or fetches while none are there).
+        """
+        await self._register_bases()
+        self._warmed = True
+        shared = self.client.shared_rates
+        if shared is None or shared.try_lead():
+            await self.refresh_once()
+            return [status.base for status in self.statuses.values() if status.last_error]
+
+        bases = list(self.statuses)
+        results = await asyncio.gather(
+            *(self.client.get_rates(base) for base in bases),
+            return_exceptions=True
+        )
+        return [base for base, result in zip(bases, results) if isinstance(result, Exception)]
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        await self._register_bases()
+        self._task = asyncio.create_task(self._run(wait_first=self._warmed))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def refresh_once(self) -> None:
+        shared = self.client.shared_rates
+        if shared is not None and not shared.try_lead():
+            return
+
+        now = datetime.now(timezone.utc)
+        due = [
+            status for status in self.statuses.values()
+            if status.next_refresh is None or status.next_refresh <= now
+        ]
+        await asyncio.gather(*(self._refresh(status) for status in due))
+
+    async def _refresh(self, status: RateRefreshStatus) -> None:
+        status.last_attempt = datetime.now(timezone.utc)
+        try:
+            await self.client.refresh_rates(status.base)
+        except Exception as e:
+            status.consecutive_failures += 1
+            status.last_error = str(e)
+            backoff = min(
+                self.interval * 2 ** status.consecutive_failures,
+                self.max_backoff
+            )
+            status.next_refresh = status.last_attempt + timedelta(seconds=backoff)
+            logger.warning("Rate refresh for %s failed: %s", status.base, e)
+        else:
+            status.consecutive_failures = 0
+            status.last_error = None
+            status.last_success = status.last_attempt
+            status.next_refresh = None
+
+    async def _run(self, wait_first: bool = False) -> None:
+        while True:
+            if not wait_first:
+                await self.refresh_once()
+            wait_first = False
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(delay)
+
+    def status(self) -> RateRefresherStatusResponse:
+        return RateRefresherStatusResponse(
+            running=self.running,
+            interval=self.interval,
+            bases=list(self.statuses.values()),
+        )
+
+
+rate_refresher = RateRefresher(
+    currency_client,
+    interval=settings.rate_refresh_interval,
+    jitter=settings.rate_refresh_jitter,
+    max_backoff=settings.rate_refresh_max_backoff,
+    bases=settings.rate_refresh_bases,
+)
@@ -0,0 +1,181 @@
+"""
+Admission control: per-user token buckets and a global concurrency limit.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Hashable, Tuple
+from fastapi import Depends, HTTPException, status
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.security import get_current_user
+from app.models.db.user import User
+
+admission_rejections = registry.counter(
+    "admission_rejections_total",
+    "Requests rejected by admission control",
+    ("reason",),
+)
+
+
+class OverloadedError(Exception):
+    """Raised when a request cannot get a concurrency slot in time."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TokenBucketLimiter:
+    """Token bucket per key, refilled at `rate` per second up to `burst`."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+            max_keys: Buckets kept, least recently used dropped first;
+                a dropped bucket was most likely full anyway
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for `key`; return 0, or the seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class ConcurrencyLimiter:
+    """
+    Caps requests in flight; extra requests wait in a bounded FIFO queue
+    and are shed once the queue is full or they wait past `queue_timeout`.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise OverloadedError("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot straight to the waiter, so `active`
+            # is not incremented here.
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            # wait_for may time out after release() already handed us the slot.
+            self._return_granted(waiter)
+            raise OverloadedError("queue_timeout")
+        except asyncio.CancelledError:
+            self._discard(waiter)
+            self._return_granted(waiter)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _return_granted(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            self.release()
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+user_rate_limiter = TokenBucketLimiter(
+    rate=settings.rate_limit_per_second,
+    burst=settings.rate_limit_burst,
+    max_keys=settings.rate_limit_max_users,
+)
+
+concurrency_limiter = ConcurrencyLimiter(
+    max_concurrent=settings.admission_max_concurrent,
+    max_queue=settings.admission_max_queue,
+    queue_timeout=settings.admission_queue_timeout,
+)
+
+registry.gauge(
+    "admission_requests",
+    "Requests holding or waiting for a concurrency slot",
+    ("state",),
+    callback=lambda: {
+        ("active",): concurrency_limiter.active,
+        ("queued",): concurrency_limiter.queued,
+    },
+)
+
+
+async def admit() -> AsyncIterator[None]:
+    """Hold a global concurrency slot for the rest of the request's handling."""
+    if not settings.admission_enabled:
+        yield
+        return
+
+    try:
+        await concurrency_limiter.acquire()
+    except OverloadedError as e:
+        admission_rejections.inc(reason=e.reason)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is overloaded, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        yield
+    finally:
+        concurrency_limiter.release()
+
+
+async def rate_limit_user(
+        current_user: User = Depends(get_current_user),
+) -> User:
+    if settings.rate_limit_enabled:
+        wait = user_rate_limiter.acquire(current_user.id)
+        if wait > 0:
+            admission_rejections.inc(reason="rate_limited")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+    return current_user
@@ -3,29 +3,107 @@ Base HTTP client for all API integrations.
 Handles common request/response logic.
 """
 
+import asyncio
+import time
 import httpx
 from typing import Any, Optional
 from app.core.config import settings
+from app.core.metrics import upstream_request_duration
+from app.core.resilience import (
+    CircuitOpenError,
+    LatencyTracker,
+    backoff_delay,
+    get_breaker,
+)
+from app.core.tracing import span
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+HEDGEABLE_METHODS = {"GET", "HEAD"}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
 
 
 class BaseClient:
     """Base client for all external API integrations."""
 
-    def __init__(self, base_url: str, timeout: float = 10.0):
+    def __init__(
+            self,
+            base_url: str,
+            timeout: float = 10.0,
+            max_connections: Optional[int] = None,
+            max_keepalive_connections: Optional[int] = None,
+            keepalive_expiry: Optional[float] = None,
+            http2: Optional[bool] = None,
+            transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         """
         Initialize base client.
 
         Args:
             base_url: Base URL for API
             timeout: Request timeout in seconds
+            max_connections: Upper bound on pooled connections
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection stays in the pool
+            http2: Negotiate HTTP/2 with the upstream (requires `h2`)
+            transport: Custom httpx transport, e.g. an in-process stub upstream
         """
         self.base_url = base_url
         self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=(
+                max_connections
+                if max_connections is not None
+                else settings.http_max_connections
+            ),
+            max_keepalive_connections=(
+                max_keepalive_connections
+                if max_keepalive_connections is not None
+                else settings.http_max_keepalive_connections
+            ),
+            keepalive_expiry=(
+                keepalive_expiry
+                if keepalive_expiry is not None
+                else settings.http_keepalive_expiry
+            ),
+        )
+        self.http2 = settings.http2 if http2 is None else http2
+        self.transport = transport
+        self.max_retries = settings.upstream_max_retries
+        self.retry_backoff = settings.upstream_retry_backoff
+        self.retry_max_backoff = settings.upstream_retry_max_backoff
+        self.hedge = settings.upstream_hedge_enabled
+        self.hedge_percentile = settings.upstream_hedge_percentile
+        self.hedge_min_delay = settings.upstream_hedge_min_delay
+        self.latency = LatencyTracker(min_samples=settings.upstream_hedge_min_samples)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared connection pool, opened on first use if `start` was not called."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def start(self) -> None:
+        """Open the shared HTTP client. Called from the application lifespan."""
+        _ = self.client
+
+    async def close(self) -> None:
+        """Close the shared HTTP client and drop pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def make_request(
             self,
             method: str,
             endpoint: str,
+            route: Optional[str] = None,
             **kwargs: Any
     ) -> httpx.Response:
         """
@@ -34,27 +112,128 @@ class BaseClient:
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint path
+            route: Fixed endpoint template used as the metrics label, for
+                endpoints built from request data; defaults to `endpoint`
             **kwargs: Additional arguments for httpx.request
 
         Returns:
             httpx.Response object (not parsed JSON!)
 
+        Idempotent methods are retried with jittered exponential backoff
+        on transport errors and 429/5xx, and GET/HEAD requests may be
+        hedged. Every attempt goes through the host's circuit breaker.
+
         Raises:
-            httpx.RequestError: If request fails
+            httpx.RequestError: If request fails (CircuitOpenError while
+                the host's circuit is open)
+            httpx.HTTPStatusError: If upstream answers with an error status
         """
         url = f"{self.base_url}/{endpoint}".rstrip("/")
+        breaker = get_breaker(httpx.URL(url).host)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        hedged = self.hedge and method.upper() in HEDGEABLE_METHODS
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        route = route if route is not None else endpoint
 
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.request(method, url, **kwargs)
-                response.raise_for_status()
+        for attempt in range(attempts):
+            if not breaker.allow():
+                raise CircuitOpenError(f"API request failed: circuit open for {url}")
+
+            try:
+                if hedged:
+                    response = await self._hedged_send(method, url, route, **kwargs)
+                else:
+                    response = await self._send(method, url, route, **kwargs)
+
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+            except httpx.HTTPStatusError as e:
+                retryable = e.response.status_code in RETRYABLE_STATUSES
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if not retryable or attempt + 1 == attempts:
+                    raise httpx.HTTPStatusError(
+                        f"HTTP error {e.response.status_code}: {e.response.text}",
+                        request=e.request,
+                        response=e.response
+                    )
+            except httpx.RequestError as e:
+                breaker.record_failure()
+                if attempt + 1 == attempts:
+                    raise httpx.RequestError(f"API request failed: {e}")
+            else:
+                breaker.record_success()
                 return response  # ✅ Возвращаем Response, не JSON!
 
-        except httpx.RequestError as e:
-            raise httpx.RequestError(f"API request failed: {e}")
-        except httpx.HTTPStatusError as e:
-            raise httpx.HTTPStatusError(
-                f"HTTP error {e.response.status_code}: {e.response.text}",
-                request=e.request,
-                response=e.response
+            await asyncio.sleep(
+                backoff_delay(attempt, self.retry_backoff, self.retry_max_backoff)
+            )
+
+    async def _send(
+            self,
+            method: str,
+            url: str,
+            route: str,
+            **kwargs: Any
+    ) -> httpx.Response:
+        """Single attempt; raises for error statuses and records timing."""
+        status = "error"
+        start = time.perf_counter()
+
+        try:
+            with span("upstream"):
+                response = await self.client.request(method, url, **kwargs)
+            status = str(response.status_code)
+            response.raise_for_status()
+            self.latency.record(time.perf_counter() - start)
+            return response
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            upstream_request_duration.observe(
+                time.perf_counter() - start,
+                endpoint=route,
+                status=status,
             )
+
+    async def _hedged_send(
+            self,
+            method: str,
+            url: str,
+            route: str,
+            **kwargs: Any
+    ) -> httpx.Response:
+        """
+        Send once; if no answer arrives within the hedge percentile of
+        recent latencies, send a second attempt and take whichever
+        succeeds first.
+        """
+        delay = self.latency.percentile(self.hedge_percentile)
+        if delay is None:
+            return await self._send(method, url, route, **kwargs)
+
+        primary = asyncio.ensure_future(self._send(method, url, route, **kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=max(delay, self.hedge_min_delay))
+        if done:
+            return primary.result()
+
+        pending = {
+            primary,
+            asyncio.ensure_future(self._send(method, url, route, **kwargs)),
+        }
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,190 @@
+"""
+In-process caches for upstream data and authenticated principals.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.metrics import cache_requests
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    stored_at: float
+    version: str = ""
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a per-entry TTL."""
+
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any) -> Optional[Any]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def evict(self, predicate: Callable[[Any], bool]) -> None:
+        """Drop every entry whose value matches `predicate`."""
+        for key in [key for key, (value, _) in self._entries.items() if predicate(value)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class RateCache:
+    """
+    LRU cache with a TTL, a stale-while-revalidate window and
+    single-flight loading.
+
+    Fresh entries are served as is. Entries older than `ttl` but within
+    `ttl + stale_ttl` are still served while one background refresh runs.
+    Anything older, or missing, is loaded by awaiting the loader; concurrent
+    misses for the same key share a single loader call. A loader may return
+    a CacheEntry to store data that is already some seconds old.
+    """
+
+    def __init__(
+            self,
+            ttl: float,
+            stale_ttl: float = 0.0,
+            max_size: int = 256,
+            name: str = "rates",
+    ):
+        """
+        Args:
+            ttl: Seconds an entry is considered fresh
+            stale_ttl: Extra seconds a stale entry may be served while refreshing
+            max_size: Maximum number of keys kept, least recently used evicted first
+            name: Label used for this cache in metrics
+        """
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._listeners: List[Callable[[str, CacheEntry], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for `key` without touching LRU order or loading."""
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, age: float = 0.0) -> None:
+        """Store `value`, optionally as if it had been fetched `age` seconds ago."""
+        previous = self._entries.get(key)
+        entry = CacheEntry(
+            value=value,
+            stored_at=time.monotonic() - age,
+            version=self.version_of(value),
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        if previous is None or previous.version != entry.version:
+            for listener in self._listeners:
+                try:
+                    listener(key, entry)
+                except Exception:
+                    logger.exception("Cache listener failed for %s", key)
+
+    def add_listener(self, listener: Callable[[str, CacheEntry], None]) -> None:
+        """Call `listener(key, entry)` whenever a key is stored with new content."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, CacheEntry], None]) -> None:
+        self._listeners.remove(listener)
+
+    @staticmethod
+    def version_of(value: Any) -> str:
+        """Content digest of `value`, equal across processes for equal data."""
+        return hashlib.blake2b(repr(value).encode(), digest_size=8).hexdigest()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            age = entry.age
+            if age < self.ttl:
+                cache_requests.inc(cache=self.name, result="hit")
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                cache_requests.inc(cache=self.name, result="stale")
+                self._load(key, loader)
+                return entry.value
+
+        cache_requests.inc(cache=self.name, result="miss")
+        # Shield so a cancelled request does not cancel the shared load.
+        return await asyncio.shield(self._load(key, loader))
+
+    async def refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Reload `key` regardless of its age, joining any load already running."""
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, loader))
+            task.add_done_callback(self._log_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _run(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            if isinstance(value, CacheEntry):
+                self.set(key, value.value, age=value.age)
+                return value.value
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Cache load failed: %s", task.exception())
@@ -1,14 +1,124 @@
-from pydantic import Field
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class ProviderConfig(BaseModel):
+    name: str
+    url: str = ""
+    format: str = Field(default="rates")
+    api_key: Optional[str] = None
+    timeout: Optional[float] = None
+    rates: Optional[Dict[str, float]] = None
+
+
 class Settings(BaseSettings):
     database_url: str = Field(default="sqlite+aiosqlite:///./currency_app.db")
+    database_read_url: Optional[str] = None
+    database_pool_size: int = Field(default=5)
+    database_max_overflow: int = Field(default=10)
+    database_pool_timeout: float = Field(default=30.0)
+    database_pool_pre_ping: bool = Field(default=True)
+    sqlite_write_pool_size: int = Field(default=1)
+    sqlite_journal_mode: str = Field(default="WAL")
+    sqlite_synchronous: str = Field(default="NORMAL")
+    sqlite_mmap_size: int = Field(default=256 * 1024 * 1024)
+    sqlite_busy_timeout_ms: int = Field(default=5000)
     jwt_secret_key: str
     jwt_algorithm: str = Field(default="HS256")
     access_token_expire_minutes: int = Field(default=30)
+    # Bounds how long other workers may keep serving a changed or deleted user.
+    auth_cache_ttl: float = Field(default=5.0)
+    auth_cache_max_size: int = Field(default=10000)
+    auth_claims_only: bool = Field(default=False)
+    password_hash_workers: int = Field(default=2)
+    password_hash_max_pending: int = Field(default=32)
+    password_hash_processes: bool = Field(default=False)
     currency_api_url: str = Field(default="https://api.apilayer.com/currency_data")
     currency_api_key: str
+    rate_providers: List[ProviderConfig] = Field(default_factory=list)
+    provider_ewma_alpha: float = Field(default=0.2)
+    provider_max_error_rate: float = Field(default=0.5)
+    provider_probe_interval: float = Field(default=30.0)
+
+    http_max_connections: int = Field(default=100)
+    http_max_keepalive_connections: int = Field(default=20)
+    http_keepalive_expiry: float = Field(default=30.0)
+    http2: bool = Field(default=False)
+
+    upstream_timeout: float = Field(default=10.0)
+    upstream_max_retries: int = Field(default=2)
+    upstream_retry_backoff: float = Field(default=0.1)
+    upstream_retry_max_backoff: float = Field(default=2.0)
+    upstream_hedge_enabled: bool = Field(default=False)
+    upstream_hedge_percentile: float = Field(default=0.95)
+    upstream_hedge_min_delay: float = Field(default=0.05)
+    upstream_hedge_min_samples: int = Field(default=20)
+    circuit_failure_threshold: int = Field(default=5)
+    circuit_reset_timeout: float = Field(default=30.0)
+
+    rate_cache_ttl: float = Field(default=60.0)
+    rate_cache_stale_ttl: float = Field(default=30.0)
+    rate_cache_max_size: int = Field(default=256)
+
+    http_cache_public: bool = Field(default=False)
+    currency_list_max_age: int = Field(default=3600)
+    fast_json_responses: bool = Field(default=False)
+
+    rate_triangulation: bool = Field(default=False)
+    rate_pivot_currency: str = Field(default="USD")
+    rate_precision: int = Field(default=12)
+    matrix_max_currencies: int = Field(default=200)
+
+    rate_refresh_enabled: bool = Field(default=True)
+    rate_refresh_interval: float = Field(default=45.0)
+    rate_refresh_jitter: float = Field(default=0.1)
+    rate_refresh_max_backoff: float = Field(default=600.0)
+    rate_refresh_bases: List[str] = Field(default_factory=list)
+
+    shared_rates_path: Optional[str] = None
+    shared_rates_slots: int = Field(default=64)
+    shared_rates_max_quotes: int = Field(default=256)
+
+    rate_snapshots_enabled: bool = Field(default=True)
+    rate_snapshot_interval: float = Field(default=300.0)
+    history_max_points: int = Field(default=5000)
+
+    metrics_enabled: bool = Field(default=True)
+
+    admin_usernames: List[str] = Field(default_factory=list)
+    tracing_enabled: bool = Field(default=False)
+    tracing_sample_rate: float = Field(default=0.1)
+    tracing_profile_rate: float = Field(default=0.1)
+    tracing_slow_threshold: float = Field(default=1.0)
+    tracing_secret: Optional[str] = None
+    tracing_profile_interval: float = Field(default=0.005)
+    tracing_max_stacks: int = Field(default=10000)
+    tracing_log_path: str = Field(default="slow_requests.log")
+    tracing_log_max_bytes: int = Field(default=10 * 1024 * 1024)
+    tracing_log_backups: int = Field(default=5)
+
+    warmup_enabled: bool = Field(default=True)
+    warmup_timeout: float = Field(default=10.0)
+    warmup_db_connections: int = Field(default=2)
+
+    rate_limit_enabled: bool = Field(default=True)
+    rate_limit_per_second: float = Field(default=20.0)
+    rate_limit_burst: float = Field(default=40.0)
+    rate_limit_max_users: int = Field(default=100000)
+    admission_enabled: bool = Field(default=True)
+    admission_max_concurrent: int = Field(default=64)
+    admission_max_queue: int = Field(default=256)
+    admission_queue_timeout: float = Field(default=0.5)
+
+    rate_stream_max_pairs: int = Field(default=50)
+    rate_stream_queue_size: int = Field(default=64)
+    rate_stream_poll_interval: float = Field(default=1.0)
+    rate_stream_max_backoff: float = Field(default=60.0)
+    rate_stream_keepalive: float = Field(default=15.0)
+
+    batch_max_items: int = Field(default=50000)
+    stream_max_line_bytes: int = Field(default=64 * 1024)
 
     model_config = SettingsConfigDict(
         env_file=".env",
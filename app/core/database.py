@@ -1,41 +1,217 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncGenerator, AsyncIterator, Dict, Optional, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import db_pool_checkout_wait, registry
+from app.core.tracing import span
 
 class Base(DeclarativeBase):
     pass
 
+
+def is_sqlite(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+
+def is_sqlite_memory(database_url: str) -> bool:
+    url = make_url(database_url)
+    return is_sqlite(database_url) and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def apply_sqlite_pragmas(engine: AsyncEngine, read_only: bool = False) -> None:
+    """Tune every new SQLite connection of `engine` as it is opened."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
 class DatabaseConnector:
-    def __init__(self, database_url: str):
+    """
+    Write engine plus a read engine for queries that never modify data.
+
+    On a SQLite file both engines open the same database: the read engine's
+    connections are query-only, and WAL lets them read while the small
+    write pool commits. Elsewhere the read engine targets `read_url` (e.g. a
+    Postgres replica) when given, and is the write engine otherwise.
+
+    Engines are created on first use, so importing the app stays cheap;
+    `warm_up` opens their connections ahead of traffic.
+    """
+
+    def __init__(self, database_url: str, read_url: Optional[str] = None):
         self.database_url = database_url
+        self.read_url = read_url
+        self._engine: Optional[AsyncEngine] = None
+        self._read_engine: Optional[AsyncEngine] = None
+        self._write_sessions: Optional[async_sessionmaker] = None
+        self._read_sessions: Optional[async_sessionmaker] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = self._create_engine(self.database_url, read_only=False)
+        return self._engine
+
+    @property
+    def read_engine(self) -> AsyncEngine:
+        if self._read_engine is None:
+            if self.read_url:
+                self._read_engine = self._create_engine(self.read_url, read_only=True)
+            elif is_sqlite(self.database_url) and not is_sqlite_memory(self.database_url):
+                self._read_engine = self._create_engine(self.database_url, read_only=True)
+            else:
+                self._read_engine = self.engine
+        return self._read_engine
+
+    @property
+    def async_session_factory(self) -> async_sessionmaker:
+        if self._write_sessions is None:
+            self._write_sessions = self._session_factory(self.engine)
+        return self._write_sessions
+
+    @property
+    def read_session_factory(self) -> async_sessionmaker:
+        if self._read_sessions is None:
+            self._read_sessions = self._session_factory(self.read_engine)
+        return self._read_sessions
 
-        self.engine = create_async_engine(
+    @staticmethod
+    def _create_engine(database_url: str, read_only: bool) -> AsyncEngine:
+        options: Dict[str, Any] = {"pool_pre_ping": settings.database_pool_pre_ping}
+
+        if is_sqlite(database_url):
+            # A local file cannot drop the connection, so pinging only adds a round trip.
+            options["pool_pre_ping"] = False
+            if not is_sqlite_memory(database_url):
+                # aiosqlite defaults to NullPool; keep tuned connections open instead.
+                # SQLite takes one writer at a time, so writes queue in the pool
+                # rather than failing with "database is locked".
+                options.update(
+                    poolclass=AsyncAdaptedQueuePool,
+                    pool_size=settings.database_pool_size if read_only else settings.sqlite_write_pool_size,
+                    max_overflow=settings.database_max_overflow if read_only else 0,
+                    pool_timeout=settings.database_pool_timeout,
+                )
+        else:
+            options.update(
+                pool_size=settings.database_pool_size,
+                max_overflow=settings.database_max_overflow,
+                pool_timeout=settings.database_pool_timeout,
+            )
+
+        engine = create_async_engine(
             database_url,
             echo=False,
             future=True,
-            pool_pre_ping=True,
-            pool_size=5,
-            max_overflow=10,
+            **options,
         )
+        if is_sqlite(database_url):
+            apply_sqlite_pragmas(engine, read_only=read_only)
+        return engine
 
-        self.async_session_factory = async_sessionmaker(
-            self.engine,
+    @staticmethod
+    def _session_factory(engine: AsyncEngine) -> async_sessionmaker:
+        return async_sessionmaker(
+            engine,
             class_=AsyncSession,
             expire_on_commit=False,
             autocommit=False,
             autoflush=False,
         )
 
+    async def warm_up(self, read_connections: int = 1) -> None:
+        """
+        Open one write and `read_connections` read connections into the pools.
+
+        The connections are held together so the pool grows to that size.
+        They go back to the pool even if the warm-up is cancelled.
+        """
+        for engine, count in ((self.engine, 1), (self.read_engine, read_connections)):
+            async with AsyncExitStack() as stack:
+                for _ in range(count):
+                    connection = await stack.enter_async_context(engine.connect())
+                    await connection.execute(text("SELECT 1"))
+
     async def close_db(self) -> None:
-        await self.engine.dispose()
+        if self._read_engine is not None and self._read_engine is not self._engine:
+            await self._read_engine.dispose()
+        if self._engine is not None:
+            await self._engine.dispose()
+
+    @asynccontextmanager
+    async def _open(self, factory: async_sessionmaker, label: str) -> AsyncIterator[AsyncSession]:
+        async with factory() as session:
+            start = time.perf_counter()
+            with span(f"db_checkout_{label}"):
+                await session.connection()
+            db_pool_checkout_wait.observe(time.perf_counter() - start, engine=label)
+            yield session
+
+    def session(self) -> AsyncContextManager[AsyncSession]:
+        """Open a write session with its connection checked out, timing the checkout."""
+        return self._open(self.async_session_factory, "primary")
+
+    def read_session(self) -> AsyncContextManager[AsyncSession]:
+        """Like `session`, on the read engine; the session must not write."""
+        return self._open(self.read_session_factory, "read")
 
     async def get_db(self) -> AsyncGenerator[AsyncSession, None]:
-        async with self.async_session_factory() as session:
+        async with self.session() as session:
             try:
                 yield session
             finally:
                 await session.close()
 
+    async def get_read_db(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.read_session() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
+
+    def pool_stats(self) -> Dict[Tuple[str, str], float]:
+        engines = []
+        if self._engine is not None:
+            engines.append(("primary", self._engine))
+        if self._read_engine is not None and self._read_engine is not self._engine:
+            engines.append(("read", self._read_engine))
+
+        stats = {}
+        for label, engine in engines:
+            pool = engine.pool
+            for state, method in (
+                ("size", "size"),
+                ("checked_out", "checkedout"),
+                ("overflow", "overflow"),
+            ):
+                if hasattr(pool, method):
+                    stats[(label, state)] = getattr(pool, method)()
+        return stats
+
+
+db = DatabaseConnector(
+    database_url=settings.database_url,
+    read_url=settings.database_read_url,
+)
 
-db = DatabaseConnector(database_url=settings.database_url)
+registry.gauge(
+    "db_pool_connections",
+    "SQLAlchemy pool connections by state",
+    ("engine", "state"),
+    callback=db.pool_stats,
+)
@@ -0,0 +1,98 @@
+"""
+Bounded executor that keeps password hashing off the event loop.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import password_hash_duration, registry
+from app.core.security import get_password_hash, verify_and_update_password
+from app.core.tracing import span
+
+
+class HasherSaturatedError(Exception):
+    """Raised when the hashing pool and its wait queue are both full."""
+
+
+class PasswordHasher:
+    """Runs pwd_context work in a dedicated pool with a bounded queue."""
+
+    def __init__(self, max_workers: int, max_pending: int, use_processes: bool = False):
+        """
+        Args:
+            max_workers: Threads (or processes) doing hashing work
+            max_pending: Calls allowed to wait for a free worker before rejecting
+            use_processes: Use a process pool instead of threads
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self.in_flight = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=self.max_workers)
+        return self._executor
+
+    def start(self) -> None:
+        _ = self.executor
+
+    async def warm_up(self) -> None:
+        """Hash once so the worker threads and passlib's backend are loaded."""
+        await self.hash("warm-up")
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        if self.in_flight >= self.max_workers + self.max_pending:
+            raise HasherSaturatedError("Password hashing pool is saturated")
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            with span(f"password_{operation}"):
+                return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            password_hash_duration.observe(time.perf_counter() - start, operation=operation)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify_and_update(
+            self,
+            plain_password: str,
+            hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and return a replacement hash if the stored one
+        is deprecated under the current CryptContext policy.
+        """
+        return await self._run(
+            "verify",
+            verify_and_update_password,
+            plain_password,
+            hashed_password
+        )
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    use_processes=settings.password_hash_processes,
+)
+
+registry.gauge(
+    "password_hash_in_flight",
+    "Password hash calls running or queued",
+    callback=lambda: {(): password_hasher.in_flight},
+)
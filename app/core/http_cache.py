@@ -0,0 +1,84 @@
+"""
+Validators and freshness headers for cacheable GET responses.
+"""
+
+import hashlib
+from typing import Dict, Optional
+from fastapi import Request, Response
+from app.core.cache import RateCache
+from app.core.config import settings
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag over `parts`, which must identify the representation."""
+    digest = hashlib.blake2b(
+        "\0".join(map(str, parts)).encode(),
+        digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match lists `etag` (weak comparison, as RFC 9110 requires)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in header.split(",")
+    )
+
+
+def cache_headers(
+        etag: str,
+        max_age: float,
+        age: Optional[float] = None,
+        stale_while_revalidate: float = 0.0,
+) -> Dict[str, str]:
+    scope = "public" if settings.http_cache_public else "private"
+    directives = [scope, f"max-age={int(max_age)}"]
+    if stale_while_revalidate > 0:
+        directives.append(f"stale-while-revalidate={int(stale_while_revalidate)}")
+
+    headers = {"ETag": etag, "Cache-Control": ", ".join(directives)}
+    if age is not None:
+        headers["Age"] = str(max(0, int(age)))
+    return headers
+
+
+def rate_cache_headers(
+        cache: RateCache,
+        key: str,
+        *parts: object,
+        fresh_only: bool = False,
+) -> Optional[Dict[str, str]]:
+    """
+    Headers for a response computed from the cached table `key`.
+
+    Args:
+        cache: Cache holding the table
+        key: Cache key of the table
+        parts: Whatever else selects the representation (route, query values)
+        fresh_only: Return None unless the entry is still within its TTL
+
+    Returns:
+        None when the table is not cached (or stale, with `fresh_only`)
+    """
+    entry = cache.peek(key)
+    if entry is None:
+        return None
+    age = entry.age
+    if fresh_only and age >= cache.ttl:
+        return None
+    return cache_headers(
+        make_etag(entry.version, key, *parts),
+        max_age=cache.ttl,
+        age=age,
+        stale_while_revalidate=cache.stale_ttl,
+    )
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
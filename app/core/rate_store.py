@@ -0,0 +1,193 @@
+"""
+Persistent rate snapshots: an L2 behind the in-process rate cache and
+the source for rate history.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import DatabaseConnector, db
+from app.core.config import settings
+from app.models.db.rate_snapshot import RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def to_utc(value: datetime) -> datetime:
+    """Normalize to aware UTC; naive values (as SQLite returns them) are taken as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class RateSnapshotStore:
+    """Writes whole fetched rate tables to `rate_snapshots` and reads them back."""
+
+    def __init__(self, database: DatabaseConnector, min_interval: float = 300.0):
+        """
+        Args:
+            database: Connector whose sessions are used for reads and writes
+            min_interval: Minimum seconds between two snapshots of the same base
+        """
+        self.database = database
+        self.min_interval = min_interval
+        self._last_saved: Dict[str, float] = {}
+        self._pending: Set[asyncio.Task] = set()
+
+    async def save(
+            self,
+            base: str,
+            rates: Dict[str, Decimal],
+            fetched_at: Optional[datetime] = None
+    ) -> None:
+        """Bulk insert one row per quote of the table, all with one fetched_at."""
+        fetched_at = to_utc(fetched_at or datetime.now(timezone.utc))
+        rows = [
+            {"base": base, "quote": quote, "rate": rate, "fetched_at": fetched_at}
+            for quote, rate in rates.items()
+        ]
+        if not rows:
+            return
+
+        async with self.database.session() as session:
+            await session.execute(insert(RateSnapshot), rows)
+            await session.commit()
+
+    def save_in_background(self, base: str, rates: Dict[str, Decimal]) -> None:
+        """Schedule `save` unless this base was snapshotted less than min_interval ago."""
+        now = time.monotonic()
+        last = self._last_saved.get(base)
+        if last is not None and now - last < self.min_interval:
+            return
+        self._last_saved[base] = now
+
+        task = asyncio.ensure_future(self.save(base, rates))
+        self._pending.add(task)
+        task.add_done_callback(self._finish)
+
+    def _finish(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Saving rate snapshot failed: %s", task.exception())
+
+    async def flush(self) -> None:
+        """Wait for snapshot writes still in flight."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def load_latest(
+            self,
+            base: str,
+            max_age: float
+    ) -> Optional[Tuple[Dict[str, Decimal], float]]:
+        """
+        Return the newest table for `base` and its age in seconds,
+        or None if there is none younger than `max_age`.
+        """
+        async with self.database.read_session() as session:
+            latest = await session.scalar(
+                select(func.max(RateSnapshot.fetched_at)).where(RateSnapshot.base == base)
+            )
+            if latest is None:
+                return None
+
+            age = (datetime.now(timezone.utc) - to_utc(latest)).total_seconds()
+            if age > max_age:
+                return None
+
+            result = await session.execute(
+                select(RateSnapshot.quote, RateSnapshot.rate).where(
+                    RateSnapshot.base == base,
+                    RateSnapshot.fetched_at == latest,
+                )
+            )
+            return {quote: Decimal(str(rate)) for quote, rate in result}, max(age, 0.0)
+
+    async def iter_tables(
+            self,
+            session: AsyncSession,
+            base: str,
+            quotes: List[str],
+            start: datetime,
+            end: datetime
+    ) -> AsyncIterator[Tuple[datetime, Dict[str, Decimal]]]:
+        """
+        Yield (fetched_at, {quote: rate}) per stored table of `base` in the
+        range, restricted to `quotes` and in chronological order.
+        """
+        result = await session.stream(
+            select(RateSnapshot.fetched_at, RateSnapshot.quote, RateSnapshot.rate)
+            .where(
+                RateSnapshot.base == base,
+                RateSnapshot.quote.in_(quotes),
+                RateSnapshot.fetched_at >= to_utc(start),
+                RateSnapshot.fetched_at <= to_utc(end),
+            )
+            .order_by(RateSnapshot.fetched_at)
+        )
+
+        current_at = None
+        table: Dict[str, Decimal] = {}
+        async for fetched_at, quote, rate in result:
+            if fetched_at != current_at:
+                if current_at is not None:
+                    yield to_utc(current_at), table
+                current_at, table = fetched_at, {}
+            table[quote] = Decimal(str(rate))
+        if current_at is not None:
+            yield to_utc(current_at), table
+
+    async def history(
+            self,
+            session: AsyncSession,
+            base: str,
+            quotes: List[str],
+            start: datetime,
+            end: datetime,
+            interval: float,
+            resolve: Callable[[Dict[str, Decimal]], Decimal]
+    ) -> List[Dict[str, Any]]:
+        """
+        Downsample stored tables into OHLC buckets of `interval` seconds,
+        aligned to the Unix epoch so bucket boundaries do not depend on `start`.
+
+        `resolve` turns one stored table into the rate of interest; tables it
+        rejects with ValueError are skipped.
+        """
+        points: List[Dict[str, Any]] = []
+
+        async for fetched_at, table in self.iter_tables(session, base, quotes, start, end):
+            try:
+                rate = resolve(table)
+            except ValueError:
+                continue
+
+            bucket = datetime.fromtimestamp(
+                fetched_at.timestamp() // interval * interval,
+                tz=timezone.utc
+            )
+            if points and points[-1]["timestamp"] == bucket:
+                point = points[-1]
+                point["high"] = max(point["high"], rate)
+                point["low"] = min(point["low"], rate)
+                point["close"] = rate
+                point["samples"] += 1
+            else:
+                points.append({
+                    "timestamp": bucket,
+                    "open": rate,
+                    "high": rate,
+                    "low": rate,
+                    "close": rate,
+                    "samples": 1,
+                })
+
+        return points
+
+
+rate_store = RateSnapshotStore(db, min_interval=settings.rate_snapshot_interval)
@@ -0,0 +1,127 @@
+"""
+Failure handling for upstream calls: circuit breakers, retry backoff
+and latency tracking for hedged requests.
+"""
+
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+class CircuitOpenError(httpx.RequestError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker: opens after `failure_threshold` consecutive failures,
+    rejects calls for `reset_timeout` seconds, then lets one trial call
+    through (half-open) and closes again if it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def abandon(self) -> None:
+        """Release a half-open trial whose call was cancelled without an outcome."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers.setdefault(host, CircuitBreaker(
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_timeout=settings.circuit_reset_timeout,
+        ))
+    return breaker
+
+
+registry.gauge(
+    "upstream_circuit_open",
+    "1 while the upstream circuit for a host is open or half-open",
+    ("host",),
+    callback=lambda: {
+        (host,): float(breaker.state != CircuitBreaker.CLOSED)
+        for host, breaker in list(_breakers.items())
+    },
+)
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Exponential backoff with full jitter for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies for percentile-based hedge delays."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._recorded = 0
+        self._cached: Optional[Tuple[int, float, float]] = None
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+        self._recorded += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency at `fraction` of the window, or None until enough samples exist."""
+        count = len(self._samples)
+        if count < self.min_samples:
+            return None
+
+        # Sorting the window on every call would cost more than hedging saves,
+        # so recompute only after a tenth of the window has turned over.
+        if self._cached is not None:
+            recorded_at, cached_fraction, value = self._cached
+            stale_after = max(1, (self._samples.maxlen or count) // 10)
+            if cached_fraction == fraction and self._recorded - recorded_at < stale_after:
+                return value
+
+        ordered = sorted(self._samples)
+        value = ordered[min(count - 1, int(fraction * count))]
+        self._cached = (self._recorded, fraction, value)
+        return value
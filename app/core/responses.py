@@ -0,0 +1,46 @@
+"""
+Response classes for hot endpoints that skip FastAPI's response_model pass.
+"""
+
+import json
+from decimal import Decimal
+from typing import Any
+from fastapi.responses import JSONResponse
+from app.core.tracing import span
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is the fallback
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON with Decimals as strings, matching the pydantic schemas."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse for payloads already shaped like their response schema.
+
+    Returning it from an endpoint bypasses response_model validation, so
+    callers must only pass plain dicts/lists of str, numbers and Decimals.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with span("render"):
+            return dumps(content)
@@ -1,13 +1,16 @@
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event, select
+from sqlalchemy.orm import ORMExecuteState, Session
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import db
+from app.core.tracing import span
 from app.models.db.user import User
 from app.models.schemas.auth import TokenData
 
@@ -15,6 +18,14 @@ pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# Per-worker cache of authenticated users by token. Changes are evicted
+# only in the worker that makes them, so every other worker may serve the
+# old user for up to AUTH_CACHE_TTL seconds; keep that short.
+principal_cache = TTLCache(
+    ttl=settings.auth_cache_ttl,
+    max_size=settings.auth_cache_max_size,
+)
+
 def get_password_hash(password: str) -> str:
     """Hash password using sha256_crypt."""
     return pwd_context.hash(password)
@@ -23,7 +34,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash."""
     return pwd_context.verify(plain_password, hashed_password)
 
-def create_access_token(user_id: int, expires_delta: Optional[timedelta] = None) -> str:
+def verify_and_update_password(
+        plain_password: str,
+        hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify password and return a new hash if the stored one is deprecated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def create_access_token(
+        user_id: int,
+        expires_delta: Optional[timedelta] = None,
+        username: Optional[str] = None,
+) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -32,6 +54,8 @@ def create_access_token(user_id: int, expires_delta: Optional[timedelta] = None)
         )
 
     to_encode = {"sub": str(user_id), "exp": expire}
+    if username is not None:
+        to_encode["username"] = username
     encoded_jwt = jwt.encode(
         to_encode,
         settings.jwt_secret_key,
@@ -58,24 +82,79 @@ def decode_access_token(token: str) -> TokenData:
         if user_id is None:
             raise credentials_exception
 
-        return TokenData(user_id=int(user_id))
+        return TokenData(
+            user_id=int(user_id),
+            username=payload.get("username"),
+            exp=payload.get("exp"),
+        )
 
     except (JWTError, ValueError, TypeError):
         raise credentials_exception
 
+def invalidate_user(user_id: int) -> None:
+    """Forget every cached principal for `user_id`."""
+    principal_cache.evict(lambda user: user.id == user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state: ORMExecuteState) -> None:
+    """ORM bulk update()/delete() skip the mapper events and name no single user."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, User):
+        principal_cache.clear()
+
+
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        session: AsyncSession = Depends(db.get_db),
 ) -> User:
-    token_data = decode_access_token(token)
-    result = await session.execute(
-        select(User).where(User.id == token_data.user_id)
-    )
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+    with span("auth"):
+        return await _resolve_user(token)
+
+
+async def _resolve_user(token: str) -> User:
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
+    with span("jwt_decode"):
+        token_data = decode_access_token(token)
+
+    if settings.auth_claims_only:
+        user = User(id=token_data.user_id, username=token_data.username)
+    else:
+        async with db.read_session() as session:
+            with span("user_query"):
+                result = await session.execute(
+                    select(User).where(User.id == token_data.user_id)
+                )
+            user = result.scalar_one_or_none()
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+
+    ttl = None
+    if token_data.exp is not None:
+        ttl = token_data.exp - time.time()
+    principal_cache.set(token, user, ttl=ttl)
     return user
 
+
+async def require_admin(
+        current_user: User = Depends(get_current_user),
+) -> User:
+    if current_user.username not in settings.admin_usernames:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
@@ -0,0 +1,241 @@
+"""
+Rate tables shared by all worker processes on a host through an mmap'd file.
+
+One worker (the holder of an flock on `<path>.lock`) fetches upstream and
+writes tables; every worker reads them without locking. Each slot carries
+a sequence counter that is odd while the slot is being written, so a
+reader that sees the same even value before and after copying a slot got
+a consistent table (a seqlock).
+
+File layout (little-endian):
+    header  magic "RATESHM1", layout version, slot count, quotes per slot
+    slot    seq u64, base 8s, fetched_at f64 (epoch), count u32,
+            then `max_quotes` of (quote 8s, rate as decimal text 24s)
+"""
+
+import logging
+import mmap
+import os
+import struct
+import time
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import registry
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; sharing is then disabled
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RATESHM1"
+LAYOUT_VERSION = 1
+HEADER = struct.Struct("<8sIII36x")
+SLOT_HEADER = struct.Struct("<Q8sdI4x")
+SEQ = struct.Struct("<Q")
+QUOTE = struct.Struct("<8s24s")
+READ_ATTEMPTS = 100
+
+
+def _encode_rate(rate: Decimal) -> bytes:
+    text = str(rate)
+    if len(text) > 24:
+        text = format(rate, ".15g")
+    return text.encode("ascii")
+
+
+class SharedRateStore:
+
+    def __init__(self, path: str, slots: int = 64, max_quotes: int = 256):
+        """
+        Args:
+            path: Data file; `<path>.lock` is used for leader election
+            slots: Number of base currencies the file can hold
+            max_quotes: Quotes stored per base; larger tables are not shared
+        """
+        self.path = path
+        self.slots = slots
+        self.max_quotes = max_quotes
+        self.slot_size = SLOT_HEADER.size + max_quotes * QUOTE.size
+        self.size = HEADER.size + slots * self.slot_size
+
+        self._map: Optional[mmap.mmap] = None
+        self._lock_fd: Optional[int] = None
+        self._slot_index: Dict[str, int] = {}
+        self._decoded: Dict[int, Tuple[int, float, Dict[str, Decimal]]] = {}
+
+    @property
+    def available(self) -> bool:
+        return fcntl is not None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_fd is not None
+
+    def _open(self) -> mmap.mmap:
+        if self._map is not None:
+            return self._map
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Serialize initialization between workers starting together.
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                expected = HEADER.pack(MAGIC, LAYOUT_VERSION, self.slots, self.max_quotes)
+                current = os.pread(fd, HEADER.size, 0)
+                if current != expected or os.fstat(fd).st_size != self.size:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, expected, 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+        return self._map
+
+    def try_lead(self) -> bool:
+        """Become the writer if no other process is; cheap once leading."""
+        if self._lock_fd is not None:
+            return True
+        if not self.available:
+            return False
+
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        logger.info("Leading shared rate store %s (pid %s)", self.path, os.getpid())
+        return True
+
+    def _slot_offset(self, index: int) -> int:
+        return HEADER.size + index * self.slot_size
+
+    def _find_slot(self, base: str, create: bool) -> Optional[int]:
+        index = self._slot_index.get(base)
+        if index is not None:
+            return index
+
+        data = self._open()
+        code = base.encode("ascii")
+        for index in range(self.slots):
+            offset = self._slot_offset(index)
+            slot_base = data[offset + 8:offset + 16].rstrip(b"\0")
+            if slot_base == code:
+                self._slot_index[base] = index
+                return index
+            if not slot_base:
+                # Slots are claimed in order, so the first empty one ends the scan.
+                if create:
+                    self._slot_index[base] = index
+                    return index
+                return None
+        return None
+
+    def write(self, base: str, rates: Dict[str, Decimal]) -> bool:
+        """Publish `rates` for `base`; only the leader may call this."""
+        if not self.is_leader:
+            raise RuntimeError("Only the leader may write the shared rate store")
+        if len(rates) > self.max_quotes:
+            logger.warning(
+                "Rate table for %s has %s quotes, more than the %s a shared slot holds",
+                base, len(rates), self.max_quotes
+            )
+            return False
+
+        index = self._find_slot(base, create=True)
+        if index is None:
+            logger.warning("Shared rate store %s has no free slot for %s", self.path, base)
+            return False
+
+        data = self._open()
+        offset = self._slot_offset(index)
+        (seq,) = SEQ.unpack_from(data, offset)
+        if seq % 2:
+            # A previous leader died mid-write; resume from the next even number.
+            seq += 1
+        SEQ.pack_into(data, offset, seq + 1)
+
+        position = offset + SLOT_HEADER.size
+        for quote, rate in rates.items():
+            QUOTE.pack_into(data, position, quote.encode("ascii"), _encode_rate(rate))
+            position += QUOTE.size
+        SLOT_HEADER.pack_into(
+            data, offset, seq + 1, base.encode("ascii"), time.time(), len(rates)
+        )
+
+        SEQ.pack_into(data, offset, seq + 2)
+        return True
+
+    def read(self, base: str) -> Optional[Tuple[Dict[str, Decimal], float]]:
+        """
+        Return the shared table for `base` and its age in seconds, or None.
+
+        The decoded table is reused for as long as the slot's sequence
+        number is unchanged, so repeat reads cost one 8-byte load.
+        """
+        if not self.available:
+            return None
+        index = self._find_slot(base, create=False)
+        if index is None:
+            return None
+
+        data = self._open()
+        offset = self._slot_offset(index)
+        for _ in range(READ_ATTEMPTS):
+            (seq,) = SEQ.unpack_from(data, offset)
+            if seq == 0:
+                return None
+            if seq % 2:
+                continue
+
+            cached = self._decoded.get(index)
+            if cached is not None and cached[0] == seq:
+                return cached[2], time.time() - cached[1]
+
+            _, _, fetched_at, count = SLOT_HEADER.unpack_from(data, offset)
+            count = min(count, self.max_quotes)
+            body = data[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + count * QUOTE.size]
+            if SEQ.unpack_from(data, offset)[0] != seq:
+                continue
+
+            rates = {
+                quote.rstrip(b"\0").decode("ascii"): Decimal(rate.rstrip(b"\0").decode("ascii"))
+                for quote, rate in QUOTE.iter_unpack(body)
+            }
+            self._decoded[index] = (seq, fetched_at, rates)
+            return rates, time.time() - fetched_at
+
+        return None
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+shared_rates: Optional[SharedRateStore] = None
+if settings.shared_rates_path:
+    shared_rates = SharedRateStore(
+        settings.shared_rates_path,
+        slots=settings.shared_rates_slots,
+        max_quotes=settings.shared_rates_max_quotes,
+    )
+    if not shared_rates.available:
+        logger.warning("fcntl is unavailable; shared rate store disabled")
+        shared_rates = None
+
+if shared_rates is not None:
+    registry.gauge(
+        "shared_rates_leader",
+        "1 while this worker writes the shared rate store",
+        callback=lambda: {(): float(shared_rates.is_leader)},
+    )
@@ -0,0 +1,65 @@
+"""
+Startup phases, their timings and the readiness state behind /ready.
+"""
+
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    STARTING = "starting"
+    READY = "ready"
+    DEGRADED = "degraded"
+    STOPPING = "stopping"
+
+    def __init__(self):
+        self.status = self.STARTING
+        self.started_at = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.failures: Dict[str, str] = {}
+
+    @property
+    def ready(self) -> bool:
+        """Serving traffic; a degraded worker serves with some warm-up steps failed."""
+        return self.status in (self.READY, self.DEGRADED)
+
+    @asynccontextmanager
+    async def timed(self, phase: str) -> AsyncIterator[None]:
+        """Record how long the enclosed startup phase takes, even if it fails."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = time.perf_counter() - start
+
+    def mark(self, phase: str) -> None:
+        """Record the time from when this module was imported until now as `phase`."""
+        self.timings[phase] = time.perf_counter() - self.started_at
+
+    def fail(self, phase: str, reason: str) -> None:
+        self.failures[phase] = reason
+
+    def mark_ready(self) -> None:
+        self.status = self.DEGRADED if self.failures else self.READY
+        self.timings["total"] = time.perf_counter() - self.started_at
+        logger.info(
+            "Ready after %.3fs: %s",
+            self.timings["total"],
+            ", ".join(f"{phase}={seconds:.3f}s" for phase, seconds in self.timings.items()
+                      if phase != "total"),
+        )
+        if self.failures:
+            logger.warning(
+                "Serving degraded, warm-up failed: %s",
+                ", ".join(f"{phase} ({reason})" for phase, reason in self.failures.items()),
+            )
+
+    def mark_stopping(self) -> None:
+        self.status = self.STOPPING
+
+
+startup = StartupState()
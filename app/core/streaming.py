@@ -0,0 +1,121 @@
+"""
+Incremental framing and row codecs for streaming bulk conversions.
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+CONVERSION_FIELDS = ["from_currency", "to_currency", "amount"]
+RESULT_FIELDS = CONVERSION_FIELDS + ["converted_amount", "exchange_rate", "error", "line"]
+
+
+async def iter_line_batches(
+        chunks: AsyncIterator[bytes],
+        max_line_bytes: int = 64 * 1024
+) -> AsyncIterator[List[Optional[bytes]]]:
+    """
+    Split a byte stream into lines, yielding the complete lines of each chunk.
+
+    Only one chunk plus one partial line is held in memory at a time. A
+    line longer than `max_line_bytes` is dropped up to its newline and
+    yielded as None, so the caller can report it and carry on.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if skipping:
+            newline = chunk.find(b"\n")
+            if newline < 0:
+                continue
+            chunk = chunk[newline + 1:]
+            skipping = False
+
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        batch: List[Optional[bytes]] = [
+            None if len(line) > max_line_bytes else line.rstrip(b"\r") for line in lines
+        ]
+        if len(buffer) > max_line_bytes:
+            batch.append(None)
+            buffer = b""
+            skipping = True
+        if batch:
+            yield batch
+    if buffer.strip():
+        yield [buffer.rstrip(b"\r")]
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator consumes the request body.
+
+    The stock response listens for `http.disconnect` on `receive` while
+    streaming, which would swallow the request body chunks. Here the body
+    iterator owns `receive`; a client that goes away surfaces as
+    `ClientDisconnect` from `request.stream()`.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+        if self.background is not None:
+            await self.background()
+
+
+class NDJSONCodec:
+    media_type = "application/x-ndjson"
+
+    def parse(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """Return the row as a dict, or None for a line that carries no row."""
+        if not line.strip():
+            return None
+        row = json.loads(line, parse_float=Decimal)
+        if not isinstance(row, dict):
+            raise ValueError("Row must be a JSON object")
+        return row
+
+    def header(self) -> bytes:
+        return b""
+
+    def format(self, row: Dict[str, Any]) -> bytes:
+        return json.dumps(
+            {key: str(value) if isinstance(value, Decimal) else value
+             for key, value in row.items() if value is not None}
+        ).encode() + b"\n"
+
+
+class CSVCodec:
+    media_type = "text/csv"
+
+    def __init__(self):
+        self.columns: Optional[List[str]] = None
+
+    def parse(self, line: bytes) -> Optional[Dict[str, Any]]:
+        if not line.strip():
+            return None
+        values = next(csv.reader([line.decode()]))
+        if self.columns is None:
+            columns = [value.strip().lower() for value in values]
+            missing = [field for field in CONVERSION_FIELDS if field not in columns]
+            if missing:
+                raise ValueError(f"CSV header is missing {', '.join(missing)}")
+            self.columns = columns
+            return None
+        return dict(zip(self.columns, values))
+
+    def header(self) -> bytes:
+        return self.format({field: field for field in RESULT_FIELDS})
+
+    def format(self, row: Dict[str, Any]) -> bytes:
+        out = io.StringIO()
+        csv.writer(out, lineterminator="\n").writerow(
+            ["" if row.get(field) is None else str(row[field]) for field in RESULT_FIELDS]
+        )
+        return out.getvalue().encode()
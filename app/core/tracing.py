@@ -0,0 +1,437 @@
+"""
+On-demand request tracing: per-request spans, a sampling profiler and a
+rotating log of slow requests.
+
+Tracing is off by default and switched on at runtime, either for a
+random fraction of requests (see `Tracer.configure`, exposed through the
+admin API) or for a single request carrying a signed `X-Trace-Token`
+header. Untraced requests pay one attribute check in the middleware and
+one context variable lookup per `span`.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from itertools import count
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List, Optional, Set, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+TRACE_HEADER = b"x-trace-token"
+MAX_SPANS = 256
+PROFILE_TOP_STACKS = 20
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_trace_ids = count(1)
+
+
+class Trace:
+    """Spans and profiler samples collected for one request."""
+
+    def __init__(self, method: str, path: str, profiled: bool, forced: bool):
+        self.id = next(_trace_ids)
+        self.method = method
+        self.path = path
+        self.profiled = profiled
+        self.forced = forced
+        self.status = 500
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.spans: List[Tuple[str, float, float]] = []
+        self.samples: "Counter[str]" = Counter()
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append((name, start - self.start, end - start))
+
+    def span_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        record: Dict[str, Any] = {
+            "trace_id": self.id,
+            "time": time.time(),
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "forced": self.forced,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round(offset * 1000, 3),
+                    "duration_ms": round(duration * 1000, 3),
+                }
+                for name, offset, duration in self.spans
+            ],
+        }
+        if self.profiled:
+            record["profile"] = dict(self.samples.most_common(PROFILE_TOP_STACKS))
+        return record
+
+
+class TraceSpan:
+    """Times the enclosed block into the current request's trace, if any."""
+
+    __slots__ = ("name", "trace", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace: Optional[Trace] = None
+        self.start = 0.0
+
+    def __enter__(self) -> "TraceSpan":
+        self.trace = _current_trace.get()
+        if self.trace is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        if self.trace is not None:
+            self.trace.add_span(self.name, self.start, time.perf_counter())
+        return False
+
+
+def span(name: str) -> TraceSpan:
+    """
+    Record the enclosed block as a span of the current trace.
+
+    Works around `await` as well as plain code:
+
+        with span("upstream"):
+            response = await client.get(url)
+    """
+    return TraceSpan(name)
+
+
+def _frame_name(frame: Any) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack while profiled requests are in flight.
+
+    A background thread wakes every `interval` seconds, reads the loop
+    thread's current frame and, unless the loop is idle in its selector,
+    adds the collapsed stack to every profiled request in flight and to
+    an aggregate profile. The loop runs one request's code at a time, so
+    a request's samples show what the loop executed while it was open,
+    which can include work done for concurrent requests.
+    """
+
+    def __init__(self, interval: float, max_stacks: int, max_depth: int = 64):
+        """
+        Args:
+            interval: Seconds between samples
+            max_stacks: Distinct stacks kept in the aggregate profile
+            max_depth: Frames kept per stack, innermost first
+        """
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.stacks: "Counter[str]" = Counter()
+        self.sample_count = 0
+        self._active: Set[Trace] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+
+    def add(self, trace: Trace) -> None:
+        """Start sampling for `trace`. Must be called on the event loop thread."""
+        self._target = threading.get_ident()
+        with self._lock:
+            self._active.add(trace)
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def discard(self, trace: Trace) -> None:
+        with self._lock:
+            self._active.discard(trace)
+            if not self._active:
+                self._wake.clear()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks = Counter()
+            self.sample_count = 0
+
+    def collapsed(self) -> str:
+        """The aggregate profile in collapsed-stack format, for flame graph tools."""
+        with self._lock:
+            items = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        return "".join(f"{stack} {samples}\n" for stack, samples in items)
+
+    def _stack(self, frame: Any) -> Optional[str]:
+        if frame is None or frame.f_globals.get("__name__") == "selectors":
+            return None
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait()
+            time.sleep(self.interval)
+            stack = self._stack(sys._current_frames().get(self._target))
+            if stack is None:
+                continue
+            with self._lock:
+                for trace in self._active:
+                    trace.samples[stack] += 1
+                if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                    self.stacks[stack] += 1
+                    self.sample_count += 1
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+def make_trace_token(secret: str, expires_at: int) -> str:
+    """Token for the `X-Trace-Token` header, valid until the epoch second `expires_at`."""
+    signature = hmac.new(secret.encode(), str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_trace_token(secret: str, token: str) -> bool:
+    expires_at, _, signature = token.partition(".")
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    return hmac.compare_digest(make_trace_token(secret, int(expires_at)), token)
+
+
+class Tracer:
+    """Runtime tracing switch, sampling decisions and the slow request log."""
+
+    def __init__(
+            self,
+            sample_rate: float,
+            profile_rate: float,
+            slow_threshold: float,
+            secret: Optional[str],
+            profiler: SamplingProfiler,
+            log_path: str,
+            log_max_bytes: int,
+            log_backups: int,
+    ):
+        """
+        Args:
+            sample_rate: Fraction of requests traced while enabled
+            profile_rate: Fraction of traced requests that are also profiled
+            slow_threshold: Seconds after which a traced request is logged
+            secret: HMAC key for `X-Trace-Token`; None disables the header
+            profiler: Sampling profiler shared by all profiled requests
+            log_path: Slow request log, one JSON object per line
+        """
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.profile_rate = profile_rate
+        self.slow_threshold = slow_threshold
+        self.secret = secret
+        self.profiler = profiler
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self.log_backups = log_backups
+        self.expires_at: Optional[float] = None
+        self.slow_requests = 0
+        self._logger: Optional[logging.Logger] = None
+        self._listener: Optional[QueueListener] = None
+
+    @property
+    def active(self) -> bool:
+        if self.enabled and self.expires_at is not None and time.time() >= self.expires_at:
+            self.enabled = False
+            self.expires_at = None
+        return self.enabled
+
+    def configure(
+            self,
+            enabled: bool,
+            sample_rate: Optional[float] = None,
+            profile_rate: Optional[float] = None,
+            slow_threshold: Optional[float] = None,
+            duration: Optional[float] = None,
+    ) -> None:
+        """
+        Switch sampled tracing on or off; `duration` turns it off again
+        after that many seconds.
+        """
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if profile_rate is not None:
+            self.profile_rate = profile_rate
+        if slow_threshold is not None:
+            self.slow_threshold = slow_threshold
+        self.enabled = enabled
+        self.expires_at = time.time() + duration if enabled and duration else None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.active,
+            "sample_rate": self.sample_rate,
+            "profile_rate": self.profile_rate,
+            "slow_threshold": self.slow_threshold,
+            "expires_at": self.expires_at,
+            "slow_requests": self.slow_requests,
+            "profile_samples": self.profiler.sample_count,
+        }
+
+    def start_trace(self, scope: Scope) -> Optional[Trace]:
+        """A trace for this request, or None if it should not be traced."""
+        if self.secret is not None:
+            for name, value in scope["headers"]:
+                if name == TRACE_HEADER:
+                    if verify_trace_token(self.secret, value.decode("latin-1")):
+                        return Trace(scope["method"], scope["path"], profiled=True, forced=True)
+                    break
+
+        if not self.active or random.random() >= self.sample_rate:
+            return None
+        profiled = random.random() < self.profile_rate
+        return Trace(scope["method"], scope["path"], profiled=profiled, forced=False)
+
+    def finish_trace(self, trace: Trace) -> None:
+        if trace.forced or trace.duration >= self.slow_threshold:
+            self.slow_requests += 1
+            self.logger.info(json.dumps(trace.to_dict()))
+
+    @property
+    def logger(self) -> logging.Logger:
+        """
+        Logger for the rotating slow request file, opened on first use.
+
+        Records are queued to a listener thread that does the file writes
+        and rotation, so logging never blocks the event loop on disk.
+        """
+        if self._logger is None:
+            handler = RotatingFileHandler(
+                self.log_path,
+                maxBytes=self.log_max_bytes,
+                backupCount=self.log_backups,
+                delay=True,
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            records: "queue.Queue[logging.LogRecord]" = queue.Queue()
+            self._listener = QueueListener(records, handler)
+            self._listener.start()
+
+            logger = logging.getLogger("app.slow_requests")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(QueueHandler(records))
+            self._logger = logger
+        return self._logger
+
+    def stop(self) -> None:
+        self.profiler.stop()
+        if self._listener is not None:
+            for handler in list(self._logger.handlers):
+                if isinstance(handler, QueueHandler):
+                    self._logger.removeHandler(handler)
+            # Stopping the listener writes out the records still queued.
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+            self._logger = None
+
+
+tracer = Tracer(
+    sample_rate=settings.tracing_sample_rate,
+    profile_rate=settings.tracing_profile_rate,
+    slow_threshold=settings.tracing_slow_threshold,
+    secret=settings.tracing_secret,
+    profiler=SamplingProfiler(
+        interval=settings.tracing_profile_interval,
+        max_stacks=settings.tracing_max_stacks,
+    ),
+    log_path=settings.tracing_log_path,
+    log_max_bytes=settings.tracing_log_max_bytes,
+    log_backups=settings.tracing_log_backups,
+)
+if settings.tracing_enabled:
+    tracer.configure(enabled=True)
+
+
+def _server_timing(trace: Trace) -> bytes:
+    entries = [f"{name.replace(' ', '_')};dur={duration * 1000:.3f}"
+               for name, duration in trace.span_totals().items()]
+    entries.append(f"total;dur={(time.perf_counter() - trace.start) * 1000:.3f}")
+    return ", ".join(entries).encode("latin-1")
+
+
+class TracingMiddleware:
+    """
+    Opens a trace for sampled requests and closes it when the response ends.
+
+    The time until the response starts is recorded as the "handler" span
+    and the time spent sending the body as "send". Requests traced through
+    `X-Trace-Token` also get a Server-Timing header with the span totals.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer = tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = self.tracer.start_trace(scope)
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = 0.0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = time.perf_counter()
+                trace.status = message["status"]
+                trace.add_span("handler", trace.start, response_started)
+                if trace.forced:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(trace)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current_trace.set(trace)
+        if trace.profiled:
+            self.tracer.profiler.add(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = time.perf_counter()
+            if trace.profiled:
+                self.tracer.profiler.discard(trace)
+            _current_trace.reset(token)
+            if response_started:
+                trace.add_span("send", response_started, end)
+            trace.duration = end - trace.start
+            self.tracer.finish_trace(trace)
@@ -0,0 +1,23 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, Index, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class RateSnapshot(Base):
+    __tablename__ = "rate_snapshots"
+    __table_args__ = (
+        Index("ix_rate_snapshots_base_quote_fetched_at", "base", "quote", "fetched_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    base: Mapped[str] = mapped_column(String(10))
+    quote: Mapped[str] = mapped_column(String(10))
+    rate: Mapped[Decimal] = mapped_column(Numeric(28, 12))
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    def __repr__(self) -> str:
+        return f"<RateSnapshot({self.base}/{self.quote}={self.rate} at {self.fetched_at})>"
@@ -0,0 +1,20 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class TracingConfigRequest(BaseModel):
+    enabled: bool
+    sample_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    profile_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    slow_threshold: Optional[float] = Field(default=None, ge=0)
+    duration: Optional[float] = Field(default=300.0, gt=0)
+
+
+class TracingStatusResponse(BaseModel):
+    enabled: bool
+    sample_rate: float
+    profile_rate: float
+    slow_threshold: float
+    expires_at: Optional[float] = None
+    slow_requests: int
+    profile_samples: int
@@ -14,6 +14,8 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     user_id: Optional[int] = None
+    username: Optional[str] = None
+    exp: Optional[int] = None
 
 
 class UserResponse(BaseModel):
@@ -1,5 +1,6 @@
+from datetime import datetime
 from decimal import Decimal
-from typing import Dict
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -27,5 +28,50 @@ class ConversionResponse(BaseModel):
     model_config = ConfigDict(json_encoders={Decimal: str})
 
 
+class BatchConversionItem(BaseModel):
+    result: Optional[ConversionResponse] = None
+    error: Optional[str] = None
+
+
 class CurrencyListResponse(BaseModel):
     currencies: Dict[str, str]
+
+
+class RateMatrixResponse(BaseModel):
+    base: str
+    rates: Dict[str, Dict[str, Decimal]]
+
+    model_config = ConfigDict(json_encoders={Decimal: str})
+
+
+class RateRefreshStatus(BaseModel):
+    base: str
+    last_attempt: Optional[datetime] = None
+    last_success: Optional[datetime] = None
+    last_error: Optional[str] = None
+    consecutive_failures: int = 0
+    next_refresh: Optional[datetime] = None
+
+
+class RateRefresherStatusResponse(BaseModel):
+    running: bool
+    interval: float
+    bases: List[RateRefreshStatus]
+
+
+class RateHistoryPoint(BaseModel):
+    timestamp: datetime
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    samples: int
+
+    model_config = ConfigDict(json_encoders={Decimal: str})
+
+
+class RateHistoryResponse(BaseModel):
+    from_currency: str
+    to_currency: str
+    interval: int
+    points: List[RateHistoryPoint]
@@ -0,0 +1,260 @@
+"""
+Load-test the API in-process against a local upstream stub.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --concurrency 1 16 64 --requests 1000
+    python -m benchmarks.run --latency 0.2 --error-rate 0.05
+    python -m benchmarks.run --save-baseline
+
+The app is served through httpx.ASGITransport with its lifespan running,
+on a throwaway SQLite database; upstream calls go to UpstreamStub through
+the same kind of transport. Each scenario is driven at each concurrency
+level, and throughput, p50/p95/p99 latency, errors and upstream call
+counts are compared against benchmarks/baseline.json. The exit status is
+1 when any scenario regresses beyond --tolerance.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+SCENARIOS = ("login", "exchange", "convert", "list")
+PAIRS = [
+    ("USD", "EUR"), ("EUR", "GBP"), ("GBP", "JPY"), ("USD", "CNY"),
+    ("AUD", "USD"), ("INR", "EUR"), ("JPY", "RUB"), ("CNY", "AUD"),
+]
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="Requests per scenario and concurrency level")
+    parser.add_argument("--login-requests", type=int, default=40,
+                        help="Requests per level for the (deliberately slow) login scenario")
+    parser.add_argument("--warmup", type=int, default=100,
+                        help="Unmeasured requests sent before each level")
+    parser.add_argument("--latency", type=float, default=0.05, help="Upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random upstream latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Upstream 503 probability")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative regression before failing")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Ignore latency increases smaller than this, whatever the ratio")
+    parser.add_argument("--output", type=Path, help="Also write results as JSON here")
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def drive(
+        request: Callable[[int], Awaitable[Any]],
+        concurrency: int,
+        total: int,
+) -> Dict[str, float]:
+    """Run `total` requests with `concurrency` workers and summarize latency."""
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            start = time.perf_counter()
+            response = await request(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput": total / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Dict[str, Dict[str, float]]]:
+    import httpx
+    from benchmarks.upstream_stub import UpstreamStub
+
+    stub = UpstreamStub(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+
+    import main as app_main
+    from app.clients.currency_client import currency_client
+    from app.core.database import Base, db
+    import app.models.db.user  # noqa: F401
+    import app.models.db.rate_snapshot  # noqa: F401
+
+    for provider in currency_client.router.providers:
+        provider.transport = httpx.ASGITransport(app=stub)
+    async with db.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    async with app_main.lifespan(app_main.app), httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app_main.app),
+        base_url="http://bench",
+        timeout=60.0,
+    ) as client:
+        credentials = {"username": "bench-user", "password": "bench-password"}
+        response = await client.post("/api/v1/auth/register", json=credentials)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        requests = {
+            "login": lambda i: client.post("/api/v1/auth/login", params=credentials),
+            "exchange": lambda i: client.get(
+                "/api/v1/currency/exchange",
+                params=dict(zip(("from_currency", "to_currency"), PAIRS[i % len(PAIRS)])),
+                headers=headers,
+            ),
+            "convert": lambda i: client.post(
+                "/api/v1/currency/convert",
+                json={
+                    "from_currency": PAIRS[i % len(PAIRS)][0],
+                    "to_currency": PAIRS[i % len(PAIRS)][1],
+                    "amount": str(10 + i % 1000),
+                },
+                headers=headers,
+            ),
+            "list": lambda i: client.get("/api/v1/currency/list", headers=headers),
+        }
+
+        for scenario in args.scenarios:
+            results[scenario] = {}
+            total = args.login_requests if scenario == "login" else args.requests
+            for concurrency in args.concurrency:
+                if scenario != "login":
+                    await drive(requests[scenario], concurrency, args.warmup)
+                calls_before = stub.total_calls
+                summary = await drive(requests[scenario], concurrency, total)
+                summary["upstream_calls"] = stub.total_calls - calls_before
+                results[scenario][str(concurrency)] = summary
+
+    return results
+
+
+def compare(
+        results: Dict[str, Dict[str, Dict[str, float]]],
+        baseline: Dict[str, Dict[str, Dict[str, float]]],
+        tolerance: float,
+        min_delta_ms: float = 0.0,
+) -> List[str]:
+    """Return a description of every metric that regressed beyond `tolerance`."""
+    regressions = []
+    for scenario, levels in results.items():
+        for concurrency, summary in levels.items():
+            expected = baseline.get(scenario, {}).get(concurrency)
+            if expected is None:
+                continue
+            label = f"{scenario} @ c={concurrency}"
+            if summary["throughput"] < expected["throughput"] * (1 - tolerance):
+                regressions.append(
+                    f"{label}: throughput {summary['throughput']:.1f}/s "
+                    f"< baseline {expected['throughput']:.1f}/s"
+                )
+            for key in ("p95_ms", "p99_ms"):
+                if (
+                    summary[key] > expected[key] * (1 + tolerance)
+                    and summary[key] - expected[key] > min_delta_ms
+                ):
+                    regressions.append(
+                        f"{label}: {key} {summary[key]:.1f} > baseline {expected[key]:.1f}"
+                    )
+            if summary["upstream_calls"] > expected["upstream_calls"]:
+                regressions.append(
+                    f"{label}: upstream calls {summary['upstream_calls']} "
+                    f"> baseline {expected['upstream_calls']}"
+                )
+    return regressions
+
+
+def report(results: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+    header = (
+        f"{'scenario':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'upstream':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for scenario, levels in results.items():
+        for concurrency, s in levels.items():
+            print(
+                f"{scenario:<10} {concurrency:>5} {s['throughput']:>9.1f} {s['p50_ms']:>8.2f} "
+                f"{s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['errors']:>7} "
+                f"{s['upstream_calls']:>9}"
+            )
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="currency-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["CURRENCY_API_URL"] = "http://upstream.stub"
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("CURRENCY_API_KEY", "benchmark-key")
+    # One benchmark user drives every request; per-user limits would cap the run.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    results = asyncio.run(run_benchmarks(args))
+    report(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    regressions = compare(
+        results,
+        json.loads(args.baseline.read_text()),
+        args.tolerance,
+        args.min_delta_ms,
+    )
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
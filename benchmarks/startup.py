@@ -0,0 +1,121 @@
+"""
+Report where worker start-up time goes: imports by module, then lifespan phases.
+
+Usage:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --top 40 --package app
+
+A child interpreter runs with -X importtime, imports main and runs the
+app lifespan (warm-up included) against the local upstream stub on a
+throwaway SQLite database. Its import log is aggregated into self and
+cumulative time per module and per top-level package, and the phase
+timings the app recorded are printed after them.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+CHILD_FLAG = "--child"
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=25, help="Modules to list")
+    parser.add_argument("--package", help="Only list modules under this package, e.g. app")
+    parser.add_argument("--latency", type=float, default=0.05, help="Upstream latency in seconds")
+    return parser.parse_args(argv)
+
+
+async def run_child(latency: float) -> Dict[str, float]:
+    import httpx
+    from benchmarks.upstream_stub import UpstreamStub
+
+    import main as app_main
+    from app.clients.currency_client import currency_client
+    from app.core.database import Base, db
+    from app.core.startup import startup
+
+    for provider in currency_client.router.providers:
+        provider.transport = httpx.ASGITransport(app=UpstreamStub(latency=latency))
+    async with db.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with app_main.lifespan(app_main.app):
+        return dict(startup.timings)
+
+
+def parse_importtime(log: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every line of a -X importtime log."""
+    rows = []
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(rows: List[Tuple[str, int, int]], phases: Dict[str, float], args: argparse.Namespace) -> None:
+    selected = [
+        row for row in rows
+        if not args.package or row[0] == args.package or row[0].startswith(args.package + ".")
+    ]
+    selected.sort(key=lambda row: row[2], reverse=True)
+
+    print(f"{'module':<50} {'self ms':>9} {'cumul ms':>9}")
+    print("-" * 70)
+    for name, self_us, cumulative_us in selected[:args.top]:
+        print(f"{name:<50} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    print(f"\n{'package (self time)':<50} {'ms':>9}")
+    print("-" * 60)
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<50} {self_us / 1000:>9.1f}")
+
+    print(f"\n{'startup phase':<50} {'ms':>9}")
+    print("-" * 60)
+    for phase, seconds in phases.items():
+        print(f"{phase:<50} {seconds * 1000:>9.1f}")
+
+
+def main(argv: List[str]) -> int:
+    if argv and argv[0] == CHILD_FLAG:
+        phases = asyncio.run(run_child(float(argv[1])))
+        print(json.dumps(phases))
+        return 0
+
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="currency-startup-")
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'startup.db')}"
+    env["CURRENCY_API_URL"] = "http://upstream.stub"
+    env.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+    env.setdefault("CURRENCY_API_KEY", "benchmark-key")
+
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "benchmarks.startup", CHILD_FLAG, str(args.latency)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if child.returncode != 0:
+        sys.stderr.write(child.stderr)
+        return child.returncode
+
+    phases = json.loads(child.stdout.strip().splitlines()[-1])
+    report(parse_importtime(child.stderr), phases, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
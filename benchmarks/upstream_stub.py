@@ -0,0 +1,70 @@
+"""
+In-process stand-in for the rates provider behind `settings.currency_api_url`.
+"""
+
+import asyncio
+import random
+from typing import Dict, Optional
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Units of each currency per 1 USD.
+USD_RATES: Dict[str, float] = {
+    "USD": 1.0,
+    "EUR": 0.92,
+    "GBP": 0.79,
+    "RUB": 91.5,
+    "JPY": 151.3,
+    "CNY": 7.24,
+    "INR": 83.4,
+    "AUD": 1.52,
+}
+
+
+class UpstreamStub:
+    """
+    ASGI app answering GET /{base} with {"base": ..., "rates": {...}}.
+
+    Every call sleeps `latency` seconds (plus up to `jitter`) and fails
+    with 503 at `error_rate`. Calls are counted per base.
+    """
+
+    def __init__(
+            self,
+            latency: float = 0.05,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            seed: Optional[int] = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls: Dict[str, int] = {}
+        self.app = Starlette(routes=[Route("/{base}", self.rates)])
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    async def rates(self, request: Request) -> JSONResponse:
+        base = request.path_params["base"].upper()
+        self.calls[base] = self.calls.get(base, 0) + 1
+
+        await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+
+        if self.random.random() < self.error_rate:
+            return JSONResponse({"error": "upstream unavailable"}, status_code=503)
+        if base not in USD_RATES:
+            return JSONResponse({"error": f"unknown base {base}"}, status_code=404)
+
+        base_rate = USD_RATES[base]
+        return JSONResponse({
+            "base": base,
+            "rates": {code: rate / base_rate for code, rate in USD_RATES.items()},
+        })
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.app(scope, receive, send)
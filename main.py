@@ -1,13 +1,89 @@
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from app.api.endpoints import auth, currency
+from app.core.startup import startup
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+from app.api.endpoints import admin, auth, currency
 from app.core.database import db
+from app.clients.currency_client import currency_client
+from app.clients.rate_feed import rate_broadcaster
+from app.clients.rate_refresher import rate_refresher
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.rate_store import rate_store
+from app.core.tracing import TracingMiddleware, tracer
+
+startup.mark("imports")
+
+
+async def warm_rates() -> None:
+    if settings.rate_refresh_enabled:
+        failed = await rate_refresher.warm()
+    else:
+        bases = await rate_refresher.resolve_bases()
+        results = await asyncio.gather(
+            *(currency_client.get_rates(base) for base in bases),
+            return_exceptions=True
+        )
+        failed = [base for base, result in zip(bases, results) if isinstance(result, Exception)]
+    if failed:
+        raise RuntimeError(f"could not prime rates for {', '.join(failed)}")
+
+
+async def warm_up() -> None:
+    """
+    Open DB and upstream connections and fill caches before taking traffic.
+
+    Steps that fail or outlast `warmup_timeout` are recorded as failures,
+    which leaves the worker ready but degraded.
+    """
+
+    async def phase(name, coroutine):
+        async with startup.timed(name):
+            try:
+                await coroutine
+            except Exception as e:
+                startup.fail(name, str(e))
+
+    tasks = {
+        name: asyncio.ensure_future(phase(name, coroutine))
+        for name, coroutine in (
+            ("warm_database", db.warm_up(settings.warmup_db_connections)),
+            ("warm_rates", warm_rates()),
+            ("warm_password_hasher", password_hasher.warm_up()),
+        )
+    }
+    _, pending = await asyncio.wait(tasks.values(), timeout=settings.warmup_timeout)
+    for name, task in tasks.items():
+        if task in pending:
+            task.cancel()
+            startup.fail(name, f"timed out after {settings.warmup_timeout}s")
+    await asyncio.gather(*pending, return_exceptions=True)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    async with startup.timed("start_clients"):
+        await currency_client.start()
+        password_hasher.start()
+        await currency.prerender_currency_list()
+
+    if settings.warmup_enabled:
+        await warm_up()
+
+    if settings.rate_refresh_enabled:
+        await rate_refresher.start()
+    startup.mark_ready()
     yield
+    startup.mark_stopping()
+    await rate_broadcaster.stop()
+    await rate_refresher.stop()
+    password_hasher.close()
+    await currency_client.close()
+    await rate_store.flush()
     await db.close_db()
+    tracer.stop()
 
 
 app = FastAPI(
@@ -17,8 +93,13 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(currency.router, prefix="/api/v1")
+app.include_router(admin.router, prefix="/api/v1")
 
 
 @app.get("/", tags=["Root"])
@@ -32,3 +113,27 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/ready", tags=["Health"])
+async def ready():
+    """
+    503 until warm-up has finished and again once shutdown begins. A
+    worker whose warm-up partly failed answers 200 with status "degraded".
+    """
+    return JSONResponse(
+        {
+            "status": startup.status,
+            "startup_seconds": startup.timings,
+            "failed": startup.failures,
+        },
+        status_code=200 if startup.ready else 503,
+    )
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    return Response(
+        content=registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
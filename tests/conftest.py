@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read at import time, so the environment is set before any app module loads.
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("CURRENCY_API_KEY", "test-key")
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.pop("SHARED_RATES_PATH", None)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def api():
+    """An HTTP client for the app with authentication resolved to a fixed user."""
+    import httpx
+
+    from app.core.security import get_current_user
+    from app.models.db.user import User
+    from main import app
+
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, username="tester")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.core import admission
+from app.core.admission import ConcurrencyLimiter, OverloadedError, TokenBucketLimiter
+
+
+def test_token_bucket_allows_burst_then_asks_to_wait():
+    limiter = TokenBucketLimiter(rate=1.0, burst=3)
+
+    assert [limiter.acquire("alice") for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = limiter.acquire("alice")
+    assert 0 < wait <= 1.0
+
+
+def test_token_buckets_are_per_key():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1)
+
+    assert limiter.acquire("alice") == 0.0
+    assert limiter.acquire("alice") > 0
+    assert limiter.acquire("bob") == 0.0
+
+
+def test_token_bucket_drops_least_recently_used_keys():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, max_keys=2)
+    limiter.acquire("alice")
+    limiter.acquire("bob")
+    limiter.acquire("carol")
+
+    # alice's empty bucket was dropped, so she starts again with a full one.
+    assert limiter.acquire("alice") == 0.0
+
+
+@pytest.mark.anyio
+async def test_concurrency_limiter_rejects_when_queue_is_full():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(OverloadedError) as error:
+        await limiter.acquire()
+    assert error.value.reason == "queue_full"
+
+    limiter.release()
+    await waiter
+    assert limiter.active == 1
+    assert limiter.queued == 0
+
+
+@pytest.mark.anyio
+async def test_concurrency_limiter_times_out_queued_requests():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=5, queue_timeout=0.01)
+    await limiter.acquire()
+
+    with pytest.raises(OverloadedError) as error:
+        await limiter.acquire()
+    assert error.value.reason == "queue_timeout"
+    assert limiter.queued == 0
+
+
+@pytest.mark.anyio
+async def test_concurrency_limiter_hands_slots_over_in_order():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=5, queue_timeout=1.0)
+    await limiter.acquire()
+    order = []
+
+    async def wait(name):
+        await limiter.acquire()
+        order.append(name)
+
+    waiters = [asyncio.ensure_future(wait(name)) for name in ("first", "second")]
+    await asyncio.sleep(0)
+    limiter.release()
+    await asyncio.sleep(0)
+    limiter.release()
+    await asyncio.gather(*waiters)
+
+    assert order == ["first", "second"]
+    assert limiter.active == 1
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_leak_its_slot():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=5, queue_timeout=1.0)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    limiter.release()
+
+    assert limiter.active == 0
+    assert limiter.queued == 0
+
+
+@pytest.mark.anyio
+async def test_slot_granted_as_the_wait_times_out_is_returned(monkeypatch):
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=5, queue_timeout=1.0)
+    await limiter.acquire()
+
+    async def wait_for_granted_then_timeout(waiter, timeout):
+        limiter.release()
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(admission.asyncio, "wait_for", wait_for_granted_then_timeout)
+    with pytest.raises(OverloadedError):
+        await limiter.acquire()
+
+    assert limiter.active == 0
@@ -0,0 +1,162 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from app.core import cache as cache_module
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import Base, db
+from app.core.security import create_access_token, invalidate_user, principal_cache
+from app.models.db.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+async def user():
+    async with db.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    principal_cache.clear()
+
+    async with db.session() as session:
+        user = User(username=f"cached-{time.monotonic_ns()}", hashed_password="x")
+        session.add(user)
+        await session.commit()
+        yield user
+    principal_cache.clear()
+
+
+def count_queries(monkeypatch):
+    opened = []
+    read_session = db.read_session
+
+    def tracked():
+        opened.append(1)
+        return read_session()
+
+    monkeypatch.setattr(db, "read_session", tracked)
+    return opened
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=3)
+    cache.set("c", 3, ttl=60)
+    cache.set("d", 4, ttl=-1)
+
+    clock.now += 5
+    assert (cache.get("a"), cache.get("b"), cache.get("d")) == (1, None, None)
+
+    clock.now += 5
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+
+
+def test_evict_drops_matching_values():
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.evict(lambda value: value == 1)
+
+    assert (cache.get("a"), cache.get("b")) == (None, 2)
+
+
+async def test_principal_is_cached_per_token(user, monkeypatch):
+    token = create_access_token(user_id=user.id, username=user.username)
+    opened = count_queries(monkeypatch)
+
+    first = await security.get_current_user(token)
+    second = await security.get_current_user(token)
+
+    assert first.id == second.id == user.id
+    assert opened == [1]
+
+
+async def test_unknown_user_is_rejected_and_not_cached(monkeypatch):
+    principal_cache.clear()
+    token = create_access_token(user_id=10 ** 9)
+
+    with pytest.raises(HTTPException) as error:
+        await security.get_current_user(token)
+
+    assert error.value.status_code == 401
+    assert len(principal_cache) == 0
+
+
+async def test_cache_entry_does_not_outlive_the_token(user, clock):
+    token = create_access_token(user_id=user.id, expires_delta=timedelta(seconds=2))
+
+    await security.get_current_user(token)
+    clock.now += 3
+
+    assert principal_cache.get(token) is None
+
+
+async def test_updating_a_user_evicts_it(user):
+    token = create_access_token(user_id=user.id)
+    await security.get_current_user(token)
+
+    async with db.session() as session:
+        stored = await session.get(User, user.id)
+        stored.hashed_password = "changed"
+        await session.commit()
+
+    assert principal_cache.get(token) is None
+
+
+async def test_bulk_update_clears_the_cache(user):
+    token = create_access_token(user_id=user.id)
+    await security.get_current_user(token)
+
+    async with db.session() as session:
+        await session.execute(
+            update(User).where(User.id == user.id).values(hashed_password="bulk")
+        )
+        await session.commit()
+
+    assert principal_cache.get(token) is None
+
+
+async def test_invalidate_user_only_drops_that_user(user):
+    principal_cache.set("other", User(id=user.id + 1, username="other"))
+    token = create_access_token(user_id=user.id)
+    await security.get_current_user(token)
+
+    invalidate_user(user.id)
+
+    assert principal_cache.get(token) is None
+    assert principal_cache.get("other") is not None
+
+
+async def test_claims_only_mode_skips_the_database(monkeypatch):
+    principal_cache.clear()
+    monkeypatch.setattr(settings, "auth_claims_only", True)
+    opened = count_queries(monkeypatch)
+    token = create_access_token(user_id=7, username="claims")
+
+    user = await security.get_current_user(token)
+
+    assert (user.id, user.username) == (7, "claims")
+    assert opened == []
+    principal_cache.clear()
@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+import pytest
+
+from app.clients.currency_client import currency_client
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+RATES = {
+    "USD": {"USD": Decimal(1), "EUR": Decimal("0.5")},
+    "EUR": {"EUR": Decimal(1), "USD": Decimal(2)},
+}
+
+
+@pytest.fixture(autouse=True)
+def rates(monkeypatch):
+    async def get_rates(base):
+        if base not in RATES:
+            raise RuntimeError("upstream down")
+        return RATES[base]
+
+    monkeypatch.setattr(currency_client, "get_rates", get_rates)
+    monkeypatch.setattr(currency_client, "triangulation", False)
+
+
+async def test_invalid_items_get_their_own_error(api):
+    response = await api.post("/api/v1/currency/convert/batch", json=[
+        {"from_currency": "usd", "to_currency": "eur", "amount": 4},
+        {"from_currency": "USD", "to_currency": "EUR", "amount": "-1"},
+        {"to_currency": "EUR"},
+        {"from_currency": "EUR", "to_currency": "USD", "amount": 3},
+    ])
+
+    assert response.status_code == 200
+    items = response.json()
+    assert items[0]["error"] is None
+    assert Decimal(str(items[0]["result"]["converted_amount"])) == Decimal("2.00")
+    assert items[1]["result"] is None and "amount" in items[1]["error"]
+    assert items[2]["result"] is None and "from_currency" in items[2]["error"]
+    assert Decimal(str(items[3]["result"]["converted_amount"])) == Decimal("6.00")
+
+
+async def test_conversion_failures_stay_in_their_slot(api):
+    response = await api.post("/api/v1/currency/convert/batch", json=[
+        {"from_currency": "USD", "to_currency": "XXX", "amount": 1},
+        {"from_currency": "GBP", "to_currency": "USD", "amount": 1},
+        {"from_currency": "USD", "to_currency": "EUR", "amount": 1},
+    ])
+
+    items = response.json()
+    assert items[0]["error"] == "Currency XXX not found"
+    assert items[1]["error"] == "Currency API error"
+    assert items[2]["error"] is None
+
+
+async def test_batch_over_the_cap_is_rejected(api):
+    item = {"from_currency": "USD", "to_currency": "EUR", "amount": 1}
+
+    response = await api.post("/api/v1/currency/convert/batch", json=[item] * (settings.batch_max_items + 1))
+
+    assert response.status_code == 422
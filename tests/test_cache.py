@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import CacheEntry, RateCache
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingLoader:
+    def __init__(self, value="v", delay=0.0, error=None):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return f"{self.value}{self.calls}"
+
+
+async def test_fresh_entry_is_served_without_loading():
+    cache = RateCache(ttl=60)
+    loader = CountingLoader()
+
+    assert await cache.get("USD", loader) == "v1"
+    assert await cache.get("USD", loader) == "v1"
+    assert loader.calls == 1
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = RateCache(ttl=60)
+    loader = CountingLoader(delay=0.01)
+
+    results = await asyncio.gather(*(cache.get("USD", loader) for _ in range(10)))
+
+    assert results == ["v1"] * 10
+    assert loader.calls == 1
+
+
+async def test_stale_entry_is_served_while_one_refresh_runs():
+    cache = RateCache(ttl=10, stale_ttl=10)
+    cache.set("USD", "old", age=15)
+    loader = CountingLoader(delay=0.01)
+
+    assert await cache.get("USD", loader) == "old"
+    assert await cache.get("USD", loader) == "old"
+    await asyncio.sleep(0.05)
+
+    assert loader.calls == 1
+    assert await cache.get("USD", loader) == "v1"
+
+
+async def test_entry_past_stale_window_is_reloaded_before_serving():
+    cache = RateCache(ttl=10, stale_ttl=10)
+    cache.set("USD", "old", age=25)
+    loader = CountingLoader()
+
+    assert await cache.get("USD", loader) == "v1"
+
+
+async def test_failed_load_is_raised_to_every_waiter_and_not_cached():
+    cache = RateCache(ttl=60)
+    loader = CountingLoader(delay=0.01, error=RuntimeError("upstream down"))
+
+    results = await asyncio.gather(
+        *(cache.get("USD", loader) for _ in range(3)),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert loader.calls == 1
+    assert cache.peek("USD") is None
+
+
+async def test_loader_may_return_an_aged_entry():
+    cache = RateCache(ttl=10)
+
+    async def loader():
+        return CacheEntry(value="snapshot", stored_at=0.0)
+
+    assert await cache.get("USD", loader) == "snapshot"
+    assert cache.peek("USD").age >= 10
+
+
+async def test_least_recently_used_key_is_evicted():
+    cache = RateCache(ttl=60, max_size=2)
+    cache.set("USD", 1)
+    cache.set("EUR", 2)
+    await cache.get("USD", CountingLoader())
+    cache.set("GBP", 3)
+
+    assert cache.peek("EUR") is None
+    assert cache.peek("USD") is not None
+
+
+async def test_listeners_only_see_changed_content():
+    cache = RateCache(ttl=60)
+    seen = []
+    cache.add_listener(lambda key, entry: seen.append((key, entry.value)))
+
+    cache.set("USD", {"EUR": 1})
+    cache.set("USD", {"EUR": 1})
+    cache.set("USD", {"EUR": 2})
+
+    assert seen == [("USD", {"EUR": 1}), ("USD", {"EUR": 2})]
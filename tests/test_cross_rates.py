@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import pytest
+
+from app.clients.currency_client import CurrencyClient, currency_client
+from app.clients.providers import ProviderRouter, StaticProvider
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+# Units of each currency per 1 USD.
+PIVOT_RATES = {"EUR": 0.5, "GBP": 0.25, "JPY": 150, "ZZZ": 0}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "rate_snapshots_enabled", False)
+    client = CurrencyClient(ProviderRouter([StaticProvider("static", PIVOT_RATES)]))
+    client.pivot_currency = "USD"
+    client.triangulation = True
+    return client
+
+
+def test_cross_rate_divides_the_pivot_rates(client):
+    rates = {code: Decimal(str(value)) for code, value in PIVOT_RATES.items()}
+
+    assert client.cross_rate(rates, "EUR", "GBP") == Decimal("0.5")
+    assert client.cross_rate(rates, "GBP", "JPY") == Decimal(600)
+    assert client.cross_rate(rates, "USD", "EUR") == Decimal("0.5")
+    assert client.cross_rate(rates, "EUR", "USD") == Decimal(2)
+    assert client.cross_rate(rates, "EUR", "EUR") == Decimal(1)
+
+
+def test_cross_rate_rejects_unknown_and_unusable_currencies(client):
+    rates = {code: Decimal(str(value)) for code, value in PIVOT_RATES.items()}
+
+    with pytest.raises(ValueError, match="Currency XXX not found"):
+        client.cross_rate(rates, "EUR", "XXX")
+    with pytest.raises(ValueError, match="Currency ZZZ has no usable rate"):
+        client.cross_rate(rates, "ZZZ", "EUR")
+
+
+def test_cross_rate_is_rounded_to_the_configured_precision(client):
+    rate = client.cross_rate({"EUR": Decimal(3), "GBP": Decimal(1)}, "EUR", "GBP")
+
+    assert len(rate.as_tuple().digits) == settings.rate_precision
+    assert rate.quantize(Decimal("0.0001")) == Decimal("0.3333")
+
+
+async def test_triangulated_lookups_share_the_pivot_table(client, monkeypatch):
+    fetched = []
+    fetch = client.router.fetch_rates
+
+    async def tracked(base):
+        fetched.append(base)
+        return await fetch(base)
+
+    monkeypatch.setattr(client.router, "fetch_rates", tracked)
+
+    assert await client.get_exchange_rate("EUR", "GBP") == Decimal("0.5")
+    assert await client.get_exchange_rate("GBP", "EUR") == Decimal(2)
+    assert fetched == ["USD"]
+
+
+async def test_direct_lookup_uses_the_source_table(client):
+    client.triangulation = False
+
+    assert client.rate_base("EUR") == "EUR"
+    assert await client.get_exchange_rate("EUR", "GBP") == Decimal("0.5")
+
+
+async def test_matrix_holds_every_cross_rate(client):
+    matrix = await client.get_rate_matrix(["USD", "EUR", "GBP"])
+
+    assert matrix["USD"] == {"USD": Decimal(1), "EUR": Decimal("0.5"), "GBP": Decimal("0.25")}
+    assert matrix["GBP"]["EUR"] == Decimal(2)
+    for code in matrix:
+        assert matrix[code][code] == Decimal(1)
+
+
+async def test_matrix_endpoint_dedupes_and_caps_currencies(api, client, monkeypatch):
+    monkeypatch.setattr(currency_client, "get_rates", client.get_rates)
+
+    response = await api.get("/api/v1/currency/matrix", params={"currencies": "usd,EUR,eur"})
+    assert response.status_code == 200
+    assert list(response.json()["rates"]) == ["USD", "EUR"]
+
+    codes = ",".join(f"C{index:02d}" for index in range(settings.matrix_max_currencies + 1))
+    response = await api.get("/api/v1/currency/matrix", params={"currencies": codes})
+    assert response.status_code == 422
@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import Base, DatabaseConnector, db
+from app.core.hashing import password_hasher
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def file_db():
+    path = os.path.join(tempfile.mkdtemp(), "split.db")
+    connector = DatabaseConnector(f"sqlite+aiosqlite:///{path}")
+    yield connector
+    await connector.close_db()
+
+
+async def test_sqlite_file_gets_a_query_only_read_engine(file_db):
+    assert file_db.read_engine is not file_db.engine
+
+    async with file_db.session() as session:
+        await session.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+        await session.execute(text("INSERT INTO item (id) VALUES (1)"))
+        await session.commit()
+
+    async with file_db.read_session() as session:
+        assert (await session.execute(text("SELECT count(*) FROM item"))).scalar_one() == 1
+        with pytest.raises(OperationalError):
+            await session.execute(text("INSERT INTO item (id) VALUES (2)"))
+
+
+async def test_in_memory_sqlite_shares_one_engine():
+    connector = DatabaseConnector("sqlite+aiosqlite:///:memory:")
+
+    assert connector.read_engine is connector.engine
+    await connector.close_db()
+
+
+async def test_read_url_gets_its_own_engine(file_db):
+    connector = DatabaseConnector(file_db.database_url, read_url="sqlite+aiosqlite:///:memory:")
+
+    assert connector.read_engine is not connector.engine
+    assert str(connector.read_engine.url) == "sqlite+aiosqlite:///:memory:"
+    await connector.close_db()
+
+
+async def test_register_and_login_hold_no_connection_while_hashing(api, monkeypatch):
+    async with db.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    checked_out = []
+    hash_password, verify = password_hasher.hash, password_hasher.verify_and_update
+
+    async def tracked_hash(password):
+        checked_out.append(sum(v for (_, state), v in db.pool_stats().items() if state == "checked_out"))
+        return await hash_password(password)
+
+    async def tracked_verify(password, hashed):
+        checked_out.append(sum(v for (_, state), v in db.pool_stats().items() if state == "checked_out"))
+        return await verify(password, hashed)
+
+    monkeypatch.setattr(password_hasher, "hash", tracked_hash)
+    monkeypatch.setattr(password_hasher, "verify_and_update", tracked_verify)
+
+    response = await api.post("/api/v1/auth/register", json={"username": "splitter", "password": "secret1"})
+    assert response.status_code == 201
+    response = await api.post("/api/v1/auth/login", params={"username": "splitter", "password": "secret1"})
+    assert response.status_code == 200
+
+    assert checked_out == [0, 0]
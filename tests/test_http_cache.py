@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+import pytest
+from starlette.requests import Request
+
+from app.clients.currency_client import currency_client
+from app.core.cache import RateCache
+from app.core.config import settings
+from app.core.http_cache import cache_headers, etag_matches, make_etag, rate_cache_headers
+
+pytestmark = pytest.mark.anyio
+
+EXCHANGE = "/api/v1/currency/exchange"
+
+
+def request_with(if_none_match=None):
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.fixture
+def cached_rates(monkeypatch):
+    async def fetch_rates(base):
+        raise AssertionError("served from the cache only")
+
+    monkeypatch.setattr(currency_client, "fetch_rates", fetch_rates)
+    monkeypatch.setattr(currency_client, "triangulation", False)
+    currency_client.rate_cache.set("USD", {"EUR": Decimal("0.5"), "GBP": Decimal("0.25")})
+    yield currency_client.rate_cache
+    currency_client.rate_cache.invalidate()
+
+
+def test_etag_depends_on_every_part():
+    assert make_etag("v1", "USD", "EUR") == make_etag("v1", "USD", "EUR")
+    assert make_etag("v1", "USD", "EUR") != make_etag("v2", "USD", "EUR")
+    assert make_etag("v1", "USD", "EUR") != make_etag("v1", "USD", "GBP")
+    assert make_etag("v1").startswith('"') and make_etag("v1").endswith('"')
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("v1")
+
+    assert etag_matches(request_with(etag), etag)
+    assert etag_matches(request_with(f'"other", W/{etag}'), etag)
+    assert etag_matches(request_with("*"), etag)
+    assert not etag_matches(request_with('"other"'), etag)
+    assert not etag_matches(request_with(), etag)
+
+
+def test_cache_headers(monkeypatch):
+    monkeypatch.setattr(settings, "http_cache_public", False)
+
+    headers = cache_headers('"x"', max_age=60.9, age=-1, stale_while_revalidate=30)
+
+    assert headers == {
+        "ETag": '"x"',
+        "Cache-Control": "private, max-age=60, stale-while-revalidate=30",
+        "Age": "0",
+    }
+    assert "Age" not in cache_headers('"x"', max_age=60)
+
+
+def test_rate_cache_headers_follow_the_entry():
+    cache = RateCache(ttl=60, stale_ttl=30)
+    assert rate_cache_headers(cache, "USD") is None
+
+    cache.set("USD", {"EUR": 1}, age=10)
+    fresh = rate_cache_headers(cache, "USD", "exchange", fresh_only=True)
+    assert fresh["Age"] == "10"
+    assert "max-age=60" in fresh["Cache-Control"]
+
+    cache.set("USD", {"EUR": 2}, age=70)
+    assert rate_cache_headers(cache, "USD", "exchange", fresh_only=True) is None
+    assert rate_cache_headers(cache, "USD", "exchange")["ETag"] != fresh["ETag"]
+
+
+async def test_revalidation_gets_304_until_the_table_changes(api, cached_rates):
+    params = {"from_currency": "USD", "to_currency": "EUR"}
+
+    response = await api.get(EXCHANGE, params=params)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = await api.get(EXCHANGE, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    other = await api.get(EXCHANGE, params={"from_currency": "USD", "to_currency": "GBP"})
+    assert other.headers["ETag"] != etag
+
+    cached_rates.set("USD", {"EUR": Decimal("0.6"), "GBP": Decimal("0.25")})
+    response = await api.get(EXCHANGE, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,97 @@
+import time
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app.clients.providers import ProviderRouter, RatesPathProvider, StaticProvider
+
+pytestmark = pytest.mark.anyio
+
+
+def upstream(name, status=200, rates=None):
+    """A RatesPathProvider on its own host whose every request gets `status`."""
+    calls = []
+
+    def handle(request):
+        calls.append(request.url.path)
+        return httpx.Response(status, json={"rates": rates or {"EUR": 0.5}})
+
+    provider = RatesPathProvider(name=name, base_url=f"http://{name}.test")
+    provider.transport = httpx.MockTransport(handle)
+    provider.max_retries = 0
+    return provider, calls
+
+
+async def test_fails_over_when_the_first_provider_errors():
+    broken, _ = upstream("broken-5xx", status=503)
+    backup = StaticProvider("backup", {"EUR": 0.5})
+    router = ProviderRouter([broken, backup])
+
+    rates = await router.fetch_rates("USD")
+
+    assert rates["EUR"] == Decimal("0.5")
+    assert router.stats["broken-5xx"].error_rate > 0
+    assert router.stats["broken-5xx"].latency is None
+    assert router.stats["backup"].latency is not None
+
+
+@pytest.mark.parametrize("status", [401, 403])
+async def test_auth_failures_fail_over_and_count_against_the_provider(status):
+    rejected, _ = upstream(f"rejected-{status}", status=status)
+    backup = StaticProvider("backup", {"EUR": 0.5})
+    router = ProviderRouter([rejected, backup], max_error_rate=0.1)
+
+    await router.fetch_rates("USD")
+
+    assert router.stats[rejected.name].error_rate > 0
+    assert router.stats[rejected.name].latency is None
+    assert not router.healthy(rejected)
+
+
+async def test_provider_errors_fail_over():
+    unknown = StaticProvider("unknown", {"GBP": 0.8})
+    backup = StaticProvider("backup", {"EUR": 0.5})
+    router = ProviderRouter([unknown, backup])
+
+    rates = await router.fetch_rates("EUR")
+
+    assert rates["EUR"] == Decimal(1)
+    assert router.stats["unknown"].error_rate > 0
+
+
+@pytest.mark.parametrize("status", [400, 404, 422])
+async def test_request_errors_are_raised_without_failover_or_stats(status):
+    first, _ = upstream(f"bad-request-{status}", status=status)
+    second, second_calls = upstream(f"untouched-{status}")
+    router = ProviderRouter([first, second])
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await router.fetch_rates("XXX")
+
+    assert second_calls == []
+    assert router.stats[first.name].error_rate == 0
+    assert router.stats[first.name].latency is None
+
+
+async def test_ranking_prefers_fast_healthy_providers():
+    fast, slow, failing = (StaticProvider(name, {}) for name in ("fast", "slow", "failing"))
+    router = ProviderRouter([slow, failing, fast], alpha=1.0)
+    now = time.monotonic()
+    for name, latency, failed in (("fast", 0.01, False), ("slow", 0.5, False), ("failing", 0.001, False)):
+        router.stats[name].record(latency, failed=failed)
+        router.stats[name].last_attempt = now
+    router.stats["failing"].record(0.0, failed=True)
+
+    assert [provider.name for provider in router.ranked()] == ["fast", "slow", "failing"]
+
+
+async def test_providers_not_tried_recently_are_probed_first():
+    fast, stale = StaticProvider("fast", {}), StaticProvider("stale", {})
+    router = ProviderRouter([fast, stale], probe_interval=30.0)
+    router.stats["fast"].record(0.01, failed=False)
+    router.stats["fast"].last_attempt = time.monotonic()
+    router.stats["stale"].record(0.5, failed=False)
+    router.stats["stale"].last_attempt = time.monotonic() - 60
+
+    assert router.ranked()[0] is stale
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+import pytest
+
+from app.api.endpoints import currency
+from app.clients.currency_client import CurrencyClient
+from app.clients.providers import ProviderRouter, StaticProvider
+from app.clients.rate_feed import RateBroadcaster, Subscription, rate_broadcaster
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+PAIR = ("USD", "EUR")
+
+
+def drain(subscription):
+    chunks = []
+    while not subscription.queue.empty():
+        chunks.append(subscription.queue.get_nowait())
+    return chunks
+
+
+@pytest.fixture
+async def broadcaster(monkeypatch):
+    monkeypatch.setattr(settings, "rate_snapshots_enabled", False)
+    client = CurrencyClient(ProviderRouter([StaticProvider("static", {"EUR": 0.5, "GBP": 0.8})]))
+    client.triangulation = False
+    broadcaster = RateBroadcaster(client, queue_size=4, poll_interval=60.0)
+    yield broadcaster
+    await broadcaster.stop()
+
+
+def test_subscription_skips_a_rate_it_already_sent():
+    subscription = Subscription([PAIR], queue_size=4)
+
+    subscription.send(PAIR, Decimal("0.5"), b"a")
+    subscription.send(PAIR, Decimal("0.5"), b"b")
+    subscription.send(PAIR, Decimal("0.6"), b"c")
+    subscription.send(PAIR, None, b"error")
+    subscription.send(PAIR, None, b"error")
+
+    assert drain(subscription) == [b"a", b"c", b"error", b"error"]
+
+
+def test_subscriber_that_falls_behind_is_closed():
+    subscription = Subscription([PAIR], queue_size=1)
+
+    subscription.send(PAIR, Decimal("0.5"), b"a")
+    subscription.send(PAIR, Decimal("0.6"), b"b")
+    subscription.send(PAIR, Decimal("0.7"), b"c")
+
+    assert subscription.closed
+    assert drain(subscription) == [None]
+
+
+async def test_update_is_fanned_out_once_per_changed_pair(broadcaster):
+    first = broadcaster.subscribe([PAIR])
+    second = broadcaster.subscribe([PAIR, ("USD", "GBP")])
+    cache = broadcaster.client.rate_cache
+
+    cache.set("USD", {"EUR": Decimal("0.5"), "GBP": Decimal("0.8")})
+    cache.set("USD", {"EUR": Decimal("0.5"), "GBP": Decimal("0.9")})
+
+    assert len(drain(first)) == 1
+    events = drain(second)
+    assert len(events) == 3
+    assert b"USD/GBP" in events[2] and b"0.9" in events[2]
+
+
+async def test_prime_does_not_repeat_a_rate_already_pushed(broadcaster):
+    subscription = broadcaster.subscribe([PAIR])
+    broadcaster.client.rate_cache.set("USD", {"EUR": Decimal("0.5")})
+
+    await broadcaster.prime(subscription)
+
+    assert len(drain(subscription)) == 1
+
+
+async def test_unsubscribe_forgets_the_pair(broadcaster):
+    subscription = broadcaster.subscribe([PAIR])
+    broadcaster.unsubscribe(subscription)
+    broadcaster.client.rate_cache.set("USD", {"EUR": Decimal("0.5")})
+
+    assert broadcaster.subscriber_count == 0
+    assert drain(subscription) == []
+
+
+async def test_stream_subscribes_only_once_it_starts():
+    events = currency._rate_events([PAIR])
+    assert rate_broadcaster.subscriber_count == 0
+
+    assert await events.__anext__() == b"retry: 3000\n\n"
+    assert rate_broadcaster.subscriber_count == 1
+
+    await events.aclose()
+    assert rate_broadcaster.subscriber_count == 0
+    await rate_broadcaster.stop()
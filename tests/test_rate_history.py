@@ -0,0 +1,130 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.core.database import Base, DatabaseConnector
+from app.core.rate_store import RateSnapshotStore
+
+pytestmark = pytest.mark.anyio
+
+EPOCH_HOUR = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def store():
+    database = DatabaseConnector("sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "history.db"))
+    async with database.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield RateSnapshotStore(database, min_interval=300.0)
+    await database.close_db()
+
+
+async def save_series(store, base, series):
+    for minutes, rates in series:
+        await store.save(
+            base,
+            {quote: Decimal(str(rate)) for quote, rate in rates.items()},
+            fetched_at=EPOCH_HOUR + timedelta(minutes=minutes),
+        )
+
+
+async def history(store, quotes, interval, resolve, start=-60, end=180):
+    async with store.database.read_session() as session:
+        return await store.history(
+            session,
+            base="USD",
+            quotes=quotes,
+            start=EPOCH_HOUR + timedelta(minutes=start),
+            end=EPOCH_HOUR + timedelta(minutes=end),
+            interval=interval,
+            resolve=resolve,
+        )
+
+
+async def test_tables_are_bucketed_into_ohlc_points(store):
+    await save_series(store, "USD", [
+        (0, {"EUR": 0.50}),
+        (20, {"EUR": 0.55}),
+        (40, {"EUR": 0.45}),
+        (59, {"EUR": 0.52}),
+        (60, {"EUR": 0.60}),
+        (150, {"EUR": 0.70}),
+    ])
+
+    points = await history(store, ["EUR"], 3600, lambda table: table["EUR"])
+
+    assert [point["timestamp"] for point in points] == [
+        EPOCH_HOUR, EPOCH_HOUR + timedelta(hours=1), EPOCH_HOUR + timedelta(hours=2),
+    ]
+    first = points[0]
+    assert (first["open"], first["high"], first["low"], first["close"], first["samples"]) == (
+        Decimal("0.5"), Decimal("0.55"), Decimal("0.45"), Decimal("0.52"), 4,
+    )
+    assert points[1]["samples"] == points[2]["samples"] == 1
+
+
+async def test_buckets_are_aligned_to_the_epoch_not_to_start(store):
+    await save_series(store, "USD", [(10, {"EUR": 0.5}), (50, {"EUR": 0.6})])
+
+    points = await history(store, ["EUR"], 1800, lambda table: table["EUR"], start=5)
+
+    assert [point["timestamp"] for point in points] == [
+        EPOCH_HOUR, EPOCH_HOUR + timedelta(minutes=30),
+    ]
+
+
+async def test_range_and_quotes_limit_the_tables_read(store):
+    await save_series(store, "USD", [
+        (-120, {"EUR": 0.1}),
+        (0, {"EUR": 0.5, "GBP": 0.25}),
+        (240, {"EUR": 0.9}),
+    ])
+    seen = []
+
+    def resolve(table):
+        seen.append(table)
+        return table["EUR"]
+
+    await history(store, ["EUR"], 3600, resolve)
+
+    assert seen == [{"EUR": Decimal("0.5")}]
+
+
+async def test_tables_the_resolver_rejects_are_skipped(store):
+    await save_series(store, "USD", [(0, {"EUR": 0.5}), (10, {"GBP": 0.25})])
+
+    def resolve(table):
+        if "EUR" not in table:
+            raise ValueError("Currency EUR not found")
+        return table["EUR"]
+
+    points = await history(store, ["EUR", "GBP"], 3600, resolve)
+
+    assert len(points) == 1 and points[0]["samples"] == 1
+
+
+async def test_load_latest_returns_only_a_recent_table(store):
+    await store.save("USD", {"EUR": Decimal("0.5")}, fetched_at=datetime.now(timezone.utc) - timedelta(seconds=30))
+
+    rates, age = await store.load_latest("USD", max_age=60)
+    assert rates == {"EUR": Decimal("0.5")}
+    assert 29 <= age <= 60
+    assert await store.load_latest("USD", max_age=10) is None
+    assert await store.load_latest("EUR", max_age=60) is None
+
+
+async def test_history_endpoint_validates_the_range(api):
+    params = {"from_currency": "USD", "to_currency": "EUR"}
+
+    response = await api.get("/api/v1/currency/history", params={
+        **params, "start": "2024-01-02T00:00:00Z", "end": "2024-01-01T00:00:00Z",
+    })
+    assert response.status_code == 400
+
+    response = await api.get("/api/v1/currency/history", params={
+        **params, "start": "2000-01-01T00:00:00Z", "end": "2024-01-01T00:00:00Z", "interval": 1,
+    })
+    assert response.status_code == 400
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import pytest
+
+from app.core.shared_rates import SEQ, SharedRateStore, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="shared rate store needs fcntl")
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = str(tmp_path / "rates.shm")
+    leader = SharedRateStore(path, slots=4, max_quotes=8)
+    follower = SharedRateStore(path, slots=4, max_quotes=8)
+    yield leader, follower
+    follower.close()
+    leader.close()
+
+
+def test_only_one_store_leads(stores):
+    leader, follower = stores
+
+    assert leader.try_lead()
+    assert not follower.try_lead()
+    with pytest.raises(RuntimeError):
+        follower.write("USD", {"EUR": Decimal("0.9")})
+
+
+def test_follower_reads_what_the_leader_writes(stores):
+    leader, follower = stores
+    leader.try_lead()
+    rates = {"EUR": Decimal("0.91"), "GBP": Decimal("0.785")}
+
+    assert leader.write("USD", rates)
+    shared, age = follower.read("USD")
+
+    assert shared == rates
+    assert 0 <= age < 5
+    assert follower.read("EUR") is None
+
+
+def test_rewrite_bumps_the_sequence_and_is_seen(stores):
+    leader, follower = stores
+    leader.try_lead()
+    leader.write("USD", {"EUR": Decimal("0.91")})
+    assert follower.read("USD")[0] == {"EUR": Decimal("0.91")}
+
+    leader.write("USD", {"EUR": Decimal("0.92")})
+
+    assert follower.read("USD")[0] == {"EUR": Decimal("0.92")}
+
+
+def test_slot_being_written_is_not_read(stores):
+    leader, follower = stores
+    leader.try_lead()
+    leader.write("USD", {"EUR": Decimal("0.91")})
+    data = leader._open()
+    offset = leader._slot_offset(leader._find_slot("USD", create=False))
+    (seq,) = SEQ.unpack_from(data, offset)
+
+    # An odd sequence number marks a write in progress.
+    SEQ.pack_into(data, offset, seq + 1)
+    assert follower.read("USD") is None
+
+    SEQ.pack_into(data, offset, seq + 2)
+    assert follower.read("USD")[0] == {"EUR": Decimal("0.91")}
+
+
+def test_oversized_table_is_not_shared(stores):
+    leader, follower = stores
+    leader.try_lead()
+    rates = {f"C{index:02d}": Decimal(index) for index in range(9)}
+
+    assert not leader.write("USD", rates)
+    assert follower.read("USD") is None
+
+
+def test_write_recovers_from_a_leader_killed_mid_write(stores):
+    leader, follower = stores
+    leader.try_lead()
+    leader.write("USD", {"EUR": Decimal("0.91")})
+    data = leader._open()
+    offset = leader._slot_offset(leader._find_slot("USD", create=False))
+    (seq,) = SEQ.unpack_from(data, offset)
+    SEQ.pack_into(data, offset, seq + 1)
+
+    leader.write("USD", {"EUR": Decimal("0.93")})
+
+    assert SEQ.unpack_from(data, offset)[0] % 2 == 0
+    assert follower.read("USD")[0] == {"EUR": Decimal("0.93")}
@@ -0,0 +1,125 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from app.api.endpoints import currency
+from app.clients.currency_client import currency_client
+from app.core.config import settings
+from app.core.streaming import CSVCodec, NDJSONCodec, RESULT_FIELDS, iter_line_batches
+
+pytestmark = pytest.mark.anyio
+
+RATES = {"USD": {"USD": Decimal(1), "EUR": Decimal("0.5")}}
+
+
+async def chunked(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(chunks, max_line_bytes=64):
+    return [batch async for batch in iter_line_batches(chunks, max_line_bytes=max_line_bytes)]
+
+
+class FakeRequest:
+    def __init__(self, *chunks):
+        self.chunks = chunks
+
+    def stream(self):
+        return chunked(*self.chunks)
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    async def get_rates(base):
+        if base not in RATES:
+            raise RuntimeError("upstream down")
+        return RATES[base]
+
+    monkeypatch.setattr(currency_client, "get_rates", get_rates)
+    monkeypatch.setattr(currency_client, "triangulation", False)
+
+
+async def convert(codec, *chunks):
+    return b"".join([chunk async for chunk in currency._convert_rows(FakeRequest(*chunks), codec)])
+
+
+async def test_lines_split_across_chunks_are_joined():
+    batches = await collect(chunked(b"a\nb", b"c\r\nd"))
+
+    assert batches == [[b"a"], [b"bc"], [b"d"]]
+
+
+async def test_oversized_line_is_reported_and_skipped():
+    batches = await collect(chunked(b"ok\n" + b"x" * 10, b"x" * 10, b"x\nnext\n"), max_line_bytes=8)
+
+    assert [line for batch in batches for line in batch] == [b"ok", None, b"next"]
+
+
+async def test_oversized_complete_line_is_reported():
+    batches = await collect(chunked(b"x" * 20 + b"\nok\n"), max_line_bytes=8)
+
+    assert batches == [[None, b"ok"]]
+
+
+def test_ndjson_parse_keeps_decimals_and_skips_blank_lines():
+    codec = NDJSONCodec()
+
+    assert codec.parse(b'{"amount": 1.10}') == {"amount": Decimal("1.10")}
+    assert codec.parse(b"   ") is None
+    with pytest.raises(ValueError):
+        codec.parse(b"[1, 2]")
+
+
+def test_csv_header_is_only_kept_once_valid():
+    codec = CSVCodec()
+
+    with pytest.raises(ValueError):
+        codec.parse(b"from,to")
+    assert codec.columns is None
+    assert codec.parse(b"From_Currency,to_currency,amount") is None
+    assert codec.parse(b"USD,EUR,2") == {"from_currency": "USD", "to_currency": "EUR", "amount": "2"}
+
+
+def test_csv_rows_carry_the_line_number():
+    codec = CSVCodec()
+
+    assert codec.header().decode().strip().split(",") == RESULT_FIELDS
+    assert codec.format({"error": "bad", "line": 4}) == b",,,,,bad,4\n"
+
+
+async def test_ndjson_conversion_with_error_rows(rates):
+    body = await convert(
+        NDJSONCodec(),
+        b'{"from_currency": "USD", "to_currency": "EUR", "amount": 4}\n',
+        b'not json\n{"from_currency": "USD", "to_currency": "XXX", "amount": 1}\n',
+        b'{"from_currency": "EUR", "to_currency": "USD", "amount": 1}\n',
+        b'{"from_currency": "USD", "to_currency": "EUR", "amount": -1}',
+    )
+    rows = [json.loads(line) for line in body.splitlines()]
+
+    assert rows[0]["converted_amount"] == "2.00"
+    assert [row.get("line") for row in rows[1:]] == [2, 3, 4, 5]
+    assert rows[3]["error"] == "Currency API error"
+    assert rows[4]["error"].startswith("amount:")
+
+
+async def test_csv_conversion_reports_bad_header_and_oversized_lines(rates, monkeypatch):
+    monkeypatch.setattr(settings, "stream_max_line_bytes", 32)
+    body = await convert(
+        CSVCodec(),
+        b"from,to\n",
+        b"from_currency,to_currency,amount\n",
+        b"USD,EUR,4\n",
+        b"USD,EUR," + b"9" * 40 + b"\n",
+        b"USD,EUR,1\n",
+    )
+    lines = body.decode().splitlines()
+
+    assert lines[0] == ",".join(RESULT_FIELDS)
+    assert lines[1].endswith(",1")
+    assert "missing" in lines[1]
+    assert lines[2] == "USD,EUR,4,2.00,0.5,,"
+    assert lines[3] == ",,,,,Line exceeds 32 bytes,4"
+    assert lines[4].startswith("USD,EUR,1,")
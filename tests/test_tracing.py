@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+from app.core.tracing import SamplingProfiler, Trace, Tracer
+
+
+def make_tracer(log_path):
+    return Tracer(
+        sample_rate=1.0,
+        profile_rate=0.0,
+        slow_threshold=0.5,
+        secret=None,
+        profiler=SamplingProfiler(interval=0.01, max_stacks=10),
+        log_path=log_path,
+        log_max_bytes=1 << 20,
+        log_backups=1,
+    )
+
+
+def test_slow_requests_are_written_off_the_calling_thread(monkeypatch):
+    log_path = os.path.join(tempfile.mkdtemp(), "slow.log")
+    tracer = make_tracer(log_path)
+    writers = []
+    tracer.logger  # opens the listener
+    file_handler = tracer._listener.handlers[0]
+    emit = file_handler.emit
+    monkeypatch.setattr(
+        file_handler, "emit", lambda record: (writers.append(threading.current_thread()), emit(record))
+    )
+
+    fast = Trace("GET", "/fast", profiled=False, forced=False)
+    slow = Trace("GET", "/slow", profiled=False, forced=False)
+    slow.duration = 1.0
+    forced = Trace("GET", "/forced", profiled=False, forced=True)
+    for trace in (fast, slow, forced):
+        tracer.finish_trace(trace)
+    tracer.stop()
+
+    with open(log_path) as log:
+        paths = [json.loads(line)["path"] for line in log]
+    assert paths == ["/slow", "/forced"]
+    assert tracer.slow_requests == 2
+    assert writers and threading.current_thread() not in writers
+
+
+def test_logger_only_queues_records():
+    tracer = make_tracer(os.path.join(tempfile.mkdtemp(), "slow.log"))
+
+    handlers = tracer.logger.handlers
+    assert any(isinstance(handler, QueueHandler) for handler in handlers)
+    assert not any(isinstance(handler, RotatingFileHandler) for handler in handlers)
+
+    tracer.stop()
+    assert not any(isinstance(handler, QueueHandler) for handler in handlers)